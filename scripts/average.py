@@ -1,23 +1,49 @@
 import math
 
+import numpy as np
+
 
 class RunningAverage:
+    """Streaming mean and variance (Welford), mergeable across workers (Chan)"""
+
     def __init__(self):
         self.count = 0
-        self.total = 0
-        self.total_square = 0
-        self.average = 0
-        self.variance = 0
+        self.average = 0.0
+        # sum of squared differences from the average
+        self.m2 = 0.0
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count > 1 else 0.0
 
     def add(self, value):
         self.count += 1
-        self.total += value
-        self.total_square += value**2
-        self.average = self.total / self.count
+        delta = value - self.average
+        self.average += delta / self.count
+        self.m2 += delta * (value - self.average)
+
+    def add_many(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+
+        batch = RunningAverage()
+        batch.count = len(values)
+        batch.average = float(values.mean())
+        batch.m2 = float(((values - batch.average) ** 2).sum())
+        self.merge(batch)
+
+    def merge(self, other: "RunningAverage") -> "RunningAverage":
+        """Adds other's values to this average, returns self"""
+        if other.count == 0:
+            return self
 
-        # Variance formula: E(x^2) - (E(x))^2
-        if self.count > 1:
-            self.variance = (self.total_square / self.count) - (self.average**2)
+        count = self.count + other.count
+        delta = other.average - self.average
+        self.average += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        return self
 
     def get_average(self):
         return self.average
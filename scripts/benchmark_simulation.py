@@ -0,0 +1,301 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Callable, List
+
+import numpy as np
+
+# benchmarks the update-scripts simulation engine on the offline data/ fixtures
+# that simulate_season loads at import, run from the repository root with the
+# update-scripts requirements installed:
+#   python scripts/benchmark_simulation.py [output.json]
+import simulate_season as sim
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "update-scripts")
+)
+
+import season_simulation_updater as engine  # noqa: E402
+
+BENCHMARK_SEED = 0
+BENCHMARK_SEASONS = 200
+BENCHMARK_RUN_SIZES = [100, 1000, 10000]
+BENCHMARK_OUTPUT = "benchmark_results.json"
+
+
+def time_calls(name: str, calls: List[Callable], **extra) -> dict:
+    """Times each call once, returns a summary of the durations in seconds"""
+    durations = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - started)
+
+    durations.sort()
+    result = {
+        "name": name,
+        "calls": len(durations),
+        "total_seconds": sum(durations),
+        "mean_seconds": sum(durations) / len(durations) if durations else 0.0,
+        "median_seconds": durations[len(durations) // 2] if durations else 0.0,
+        "min_seconds": durations[0] if durations else 0.0,
+        **extra,
+    }
+
+    print(
+        f"{name}: {result['calls']} calls, mean {result['mean_seconds'] * 1e6:.1f}us, "
+        f"total {result['total_seconds']:.3f}s"
+    )
+    return result
+
+
+def engine_inputs():
+    """The fixtures as the engine's Team, Event and EventOdds"""
+    teams = [engine.Team(**asdict(team)) for team in sim.teams]
+    events = [engine.Event(**asdict(event)) for event in sim.events]
+    odds = [engine.EventOdds(**asdict(event_odds)) for event_odds in sim.event_odds]
+    return teams, events, odds
+
+
+def tie_groups(
+    simulation: engine.NFLSimulation, results, team_ids: List[str]
+) -> List[List[str]]:
+    """Groups of two or more teams with the same number of wins"""
+    teams_sorted_by_wins = sorted(
+        team_ids, key=lambda t: simulation.get_wins(results, t)
+    )
+    groups = [
+        list(group)
+        for _, group in groupby(
+            teams_sorted_by_wins, key=lambda t: simulation.get_wins(results, t)
+        )
+    ]
+    return [group for group in groups if len(group) > 1]
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks() -> List[dict]:
+    teams, events, odds = engine_inputs()
+    benchmarks = []
+
+    simulations = []
+    benchmarks.append(
+        time_calls(
+            "NFLSimulation",
+            [
+                lambda: simulations.append(
+                    engine.NFLSimulation(
+                        teams, events, odds, engine.TIEBREAK_CACHE_SIZE
+                    )
+                )
+            ],
+        )
+    )
+    simulation = simulations[0]
+
+    # sampled seasons, reused as inputs to the ranking and tiebreaker benchmarks
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    outcomes = []
+    benchmarks.append(
+        time_calls(
+            "sample_outcomes",
+            [
+                lambda: outcomes.append(
+                    simulation.sample_outcomes(BENCHMARK_SEASONS, rng)
+                )
+            ],
+            n_simulations=BENCHMARK_SEASONS,
+        )
+    )
+
+    season_results = []
+    benchmarks.append(
+        time_calls(
+            "results_from_outcomes",
+            [
+                lambda row=row: season_results.append(
+                    simulation.results_from_outcomes(row)
+                )
+                for row in outcomes[0]
+            ],
+        )
+    )
+
+    divisions = [
+        sorted(team.id for team in teams if team.division == division)
+        for division in sorted(set(team.division for team in teams))
+    ]
+    conferences = [
+        sorted(team.id for team in teams if team.division.startswith(conference))
+        for conference in ["NFC", "AFC"]
+    ]
+
+    for ranking_type, groups in [
+        (engine.RankingType.DIVISION, divisions),
+        (engine.RankingType.CONFERENCE, conferences),
+    ]:
+        benchmarks.append(
+            time_calls(
+                f"compute_rankings[{ranking_type.name}]",
+                [
+                    lambda r=r, g=g: simulation.compute_rankings(
+                        r, list(g), ranking_type
+                    )
+                    for r in season_results
+                    for g in groups
+                ],
+            )
+        )
+
+    # the selections a simulated season makes: each division winner, then the
+    # three wildcards of each conference
+    division_winners = [
+        {
+            simulation.select_top_teams(r, list(d), engine.RankingType.DIVISION, 1)[0]
+            for d in divisions
+        }
+        for r in season_results
+    ]
+    benchmarks.append(
+        time_calls(
+            "select_top_teams[DIVISION]",
+            [
+                lambda r=r, d=d: simulation.select_top_teams(
+                    r, list(d), engine.RankingType.DIVISION, 1
+                )
+                for r in season_results
+                for d in divisions
+            ],
+        )
+    )
+    benchmarks.append(
+        time_calls(
+            "select_top_teams[CONFERENCE]",
+            [
+                lambda r=r, c=c, w=w: simulation.select_top_teams(
+                    r, list(c), engine.RankingType.CONFERENCE, 3, w
+                )
+                for r, w in zip(season_results, division_winners)
+                for c in conferences
+            ],
+        )
+    )
+
+    benchmarks.append(
+        time_calls(
+            "bitsliced_division_winners",
+            [lambda: simulation.bitsliced_division_winners(outcomes[0], divisions)],
+            n_simulations=BENCHMARK_SEASONS,
+        )
+    )
+
+    # tied groups as the rankings would pass them to the tiebreakers
+    division_ties = [
+        (r, group)
+        for r in season_results
+        for d in divisions
+        for group in tie_groups(simulation, r, list(d))
+    ]
+    conference_ties = [
+        (r, group)
+        for r in season_results
+        for c in conferences
+        for group in tie_groups(simulation, r, list(c))
+    ]
+    all_ties = division_ties + conference_ties
+
+    tiebreakers = {
+        "break_division_tie": (
+            lambda r, g: simulation.break_division_tie(
+                r, g, engine.RankingType.DIVISION
+            ),
+            division_ties,
+        ),
+        "break_conference_tie": (simulation.break_conference_tie, conference_ties),
+        "get_h2h_winner": (simulation.get_h2h_winner, all_ties),
+        "get_common_opponents": (
+            lambda r, g: simulation.get_common_opponents(g),
+            all_ties,
+        ),
+        "get_conference_record_results": (
+            simulation.get_conference_record_results,
+            all_ties,
+        ),
+        "get_strength_of_victory": (simulation.get_strength_of_victory, all_ties),
+        "get_strength_of_schedule": (simulation.get_strength_of_schedule, all_ties),
+    }
+    for name, (tiebreaker, ties) in tiebreakers.items():
+        benchmarks.append(
+            time_calls(
+                name,
+                [lambda f=tiebreaker, r=r, g=g: f(r, g) for r, g in ties],
+            )
+        )
+
+    benchmarks.append(
+        time_calls(
+            "get_division_win_pct",
+            [
+                lambda r=r, t=t: simulation.get_division_win_pct(r, t)
+                for r, group in division_ties
+                for t in group
+            ],
+        )
+    )
+
+    # one worker's chunk, without the process pool
+    for backend in engine.SimulationBackend:
+        for n_simulations in BENCHMARK_RUN_SIZES:
+            result = time_calls(
+                f"simulate_seasons[{backend.value}][{n_simulations}]",
+                [
+                    lambda n=n_simulations, b=backend: engine.simulate_seasons(
+                        teams,
+                        events,
+                        odds,
+                        n,
+                        np.random.SeedSequence(BENCHMARK_SEED),
+                        backend=b,
+                    )
+                ],
+                n_simulations=n_simulations,
+            )
+            result["seasons_per_second"] = n_simulations / result["total_seconds"]
+            benchmarks.append(result)
+
+    return benchmarks
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else BENCHMARK_OUTPUT
+
+    benchmarks = run_benchmarks()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": BENCHMARK_SEED,
+        "benchmarks": benchmarks,
+    }
+
+    with open(output, "w") as outfile:
+        json.dump(report, outfile, indent=2)
+
+    print(f"Wrote {len(benchmarks)} benchmarks to {output}")
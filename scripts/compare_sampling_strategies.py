@@ -0,0 +1,30 @@
+import asyncio
+import sys
+
+# runs the update-scripts engine with every sampling strategy on the offline
+# data/ fixtures and prints each one's estimated variance, for choosing
+# SAMPLING_STRATEGY, run from the repository root with the update-scripts
+# requirements installed:
+#   python scripts/compare_sampling_strategies.py [n_simulations]
+from benchmark_simulation import engine, engine_inputs
+
+COMPARISON_SIMULATIONS = 20000
+
+
+async def compare(n_simulations: int):
+    teams, events, odds = engine_inputs()
+
+    results = await engine.compare_sampling_strategies(
+        teams, events, odds, n_simulations
+    )
+
+    best = min(results, key=lambda s: results[s].estimator_variance().mean())
+    print(
+        f"Lowest mean variance over {n_simulations} simulations: {best.value} "
+        f"(SAMPLING_STRATEGY is {engine.SAMPLING_STRATEGY.value})"
+    )
+
+
+if __name__ == "__main__":
+    n_simulations = int(sys.argv[1]) if len(sys.argv) > 1 else COMPARISON_SIMULATIONS
+    asyncio.run(compare(n_simulations))
@@ -0,0 +1,87 @@
+import json
+import os
+import random
+import sys
+
+from aiohttp import web
+
+# Local stand-in for the Odds API, serving the data/ fixtures with quota headers
+# and injected rate limiting, run from the repository root:
+#   python scripts/fake_odds_api.py [port]
+# and point the updaters at it with ODDS_API_URL=http://localhost:<port>
+
+FAKE_QUOTA = int(os.getenv("FAKE_QUOTA", "500"))
+# fraction of requests answered with a 429
+FAKE_RATE_LIMITED_FRACTION = float(os.getenv("FAKE_RATE_LIMITED_FRACTION", "0.1"))
+
+events = json.load(open(os.getcwd() + "/data/events.json"))
+event_odds = {}
+for filename in os.listdir(os.getcwd() + "/data/odds"):
+    with open(os.getcwd() + "/data/odds/" + filename) as infile:
+        odds = json.load(infile)
+        event_odds[odds["id"]] = odds
+
+used = 0
+
+
+def quota_headers() -> dict:
+    return {
+        "x-requests-remaining": str(max(FAKE_QUOTA - used, 0)),
+        "x-requests-used": str(used),
+    }
+
+
+@web.middleware
+async def quota_middleware(request, handler):
+    global used
+
+    if used >= FAKE_QUOTA:
+        return web.json_response(
+            {"message": "Usage quota has been reached"},
+            status=401,
+            headers=quota_headers(),
+        )
+
+    if random.random() < FAKE_RATE_LIMITED_FRACTION:
+        print(f"429 {request.path}")
+        return web.json_response(
+            {"message": "Too many requests"}, status=429, headers={"Retry-After": "1"}
+        )
+
+    used += 1
+    response = await handler(request)
+    response.headers.update(quota_headers())
+    print(f"{response.status} {request.path} ({used}/{FAKE_QUOTA} used)")
+    return response
+
+
+async def get_odds(request):
+    return web.json_response(list(event_odds.values()))
+
+
+async def get_event_odds(request):
+    event_id = request.match_info["event_id"]
+    if event_id not in event_odds:
+        return web.json_response({"message": "Event not found"}, status=404)
+    return web.json_response(event_odds[event_id])
+
+
+async def get_scores(request):
+    return web.json_response(
+        [
+            {**event, "completed": False, "scores": None, "last_update": None}
+            for event in events
+        ]
+    )
+
+
+app = web.Application(middlewares=[quota_middleware])
+app.router.add_get("/v4/sports/americanfootball_nfl/odds", get_odds)
+app.router.add_get(
+    "/v4/sports/americanfootball_nfl/events/{event_id}/odds", get_event_odds
+)
+app.router.add_get("/v4/sports/americanfootball_nfl/scores", get_scores)
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    web.run_app(app, port=port)
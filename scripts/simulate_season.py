@@ -20,6 +20,9 @@ load_dotenv()
 CURRENT_SEASON = "2024"
 SIMULATION_GROUP = 7
 N_SIMULATIONS = 100000
+SIMULATION_BATCH_SIZE = 10000
+SIMULATION_TOLERANCE = 0.002
+SIMULATION_TIME_BUDGET_SECONDS = 300
 
 dbname = os.getenv("DB_DATABASE")
 user = os.getenv("DB_USER")
@@ -740,7 +743,7 @@ def compute_rankings(
     return final_ranking
 
 
-def simulate_season():
+def simulate_season(rng: random.Random = random):
 
     results_map = {}  # maps team_id: {wins: [event_ids], losses: [event_ids]}
 
@@ -777,7 +780,7 @@ def simulate_season():
 
         home_prob, away_prob = compute_win_prob(home_odds, away_odds)
 
-        is_home_win = random.random() <= home_prob
+        is_home_win = rng.random() <= home_prob
 
         if is_home_win:
 
@@ -846,7 +849,27 @@ def simulate_season():
     )
 
 
-def simulate_n(n_simulations=1000):
+def max_standard_error(results, n_simulations):
+    standard_error = 0
+    for team_results in results.values():
+        for key in ["make_playoffs", "win_division", "win_conference"]:
+            p = team_results[key] / n_simulations
+            standard_error = max(standard_error, (p * (1 - p) / n_simulations) ** 0.5)
+    return standard_error
+
+
+def simulate_n(
+    n_simulations=1000,
+    tolerance=SIMULATION_TOLERANCE,
+    time_budget_seconds=SIMULATION_TIME_BUDGET_SECONDS,
+    seed=None,
+):
+
+    # the same seed reproduces a run exactly
+    if seed is None:
+        seed = random.randrange(2**63)
+    print(f"Simulating with seed {seed}")
+    rng = random.Random(seed)
 
     results = {
         team_id: {
@@ -859,14 +882,25 @@ def simulate_n(n_simulations=1000):
         for team_id in team_map.keys()
     }
 
+    started = time.monotonic()
+    completed_simulations = 0
+
+    # win counts of the current batch, merged into expected_wins per batch
+    batch_wins = {team_id: [] for team_id in team_map.keys()}
+
+    def merge_batch_wins():
+        for team_id, wins in batch_wins.items():
+            results[team_id]["expected_wins"].add_many(wins)
+            wins.clear()
+
     for i in tqdm(range(n_simulations)):
 
-        nfc_rankings, afc_rankings, results_map = simulate_season()
+        nfc_rankings, afc_rankings, results_map = simulate_season(rng)
 
         for team_id, team_results in results_map.items():
             n_wins = len(team_results["wins"])
             results[team_id]["wins"][n_wins] += 1
-            results[team_id]["expected_wins"].add(len(team_results["wins"]))
+            batch_wins[team_id].append(n_wins)
 
         for i in range(7):
 
@@ -881,19 +915,31 @@ def simulate_n(n_simulations=1000):
                 results[nfc_rankings[i]]["win_conference"] += 1
                 results[afc_rankings[i]]["win_conference"] += 1
 
+        completed_simulations += 1
+
+        # stop early once every probability is precise enough
+        if completed_simulations % SIMULATION_BATCH_SIZE == 0:
+            merge_batch_wins()
+            if max_standard_error(results, completed_simulations) < tolerance:
+                break
+            if time.monotonic() - started > time_budget_seconds:
+                break
+
+    merge_batch_wins()
+
     for team_id in team_map.keys():
-        results[team_id]["make_playoffs"] /= n_simulations
-        results[team_id]["win_division"] /= n_simulations
-        results[team_id]["win_conference"] /= n_simulations
+        results[team_id]["make_playoffs"] /= completed_simulations
+        results[team_id]["win_division"] /= completed_simulations
+        results[team_id]["win_conference"] /= completed_simulations
         for i in results[team_id]["wins"].keys():
-            results[team_id]["wins"][i] /= n_simulations
+            results[team_id]["wins"][i] /= completed_simulations
 
-    return results
+    return results, completed_simulations
 
 
 def run_and_update():
 
-    results = simulate_n(N_SIMULATIONS)
+    results, n_simulations = simulate_n(N_SIMULATIONS)
 
     conn = psycopg2.connect(
         dbname=dbname, user=user, password=password, host=host, port=port
@@ -930,7 +976,7 @@ def run_and_update():
                     team_results["make_playoffs"],
                     team_results["win_division"],
                     team_results["win_conference"],
-                    N_SIMULATIONS,
+                    n_simulations,
                     team_results["expected_wins"].get_average(),
                     team_results["expected_wins"].get_standard_deviation(),
                     json.dumps(team_results["wins"]),
@@ -944,6 +990,5 @@ def run_and_update():
     conn.close()
 
 
-# run_and_update()
-
-results = run_and_update()
+if __name__ == "__main__":
+    run_and_update()
@@ -1,30 +1,11 @@
-import time
 from datetime import datetime, timezone
 from typing import List
 from uuid import uuid4
 
-import requests
-from config import ODDS_API_KEY, SEASON
+from config import SEASON
 from models import Event, EventOdds
 
 
-def get_game_status(days_from: int = 0) -> List[Event]:
-    endpoint = f"https://api.the-odds-api.com/v4/sports/americanfootball_nfl/scores?apiKey={ODDS_API_KEY}"
-    if days_from > 0:
-        endpoint += f"&daysFrom={days_from}"
-
-    response = requests.get(endpoint)
-    if response.status_code == 429:
-        time.sleep(5)
-        response = requests.get(endpoint)
-
-    if response.status_code != 200:
-        return []
-
-    raw_events = response.json()
-    return [parse_odds_api_score(event) for event in raw_events]
-
-
 def parse_odds_api_score(event: dict) -> Event:
     commence_time = event["commence_time"]
 
@@ -58,26 +39,7 @@ def parse_odds_api_score(event: dict) -> Event:
     )
 
 
-def get_odds_api_event_odds(event_id: str) -> List[EventOdds]:
-    endpoint = f"https://api.the-odds-api.com/v4/sports/americanfootball_nfl/events/{event_id}/odds"
-
-    params = {
-        "apiKey": ODDS_API_KEY,
-        "regions": "us",
-        "markets": "h2h",
-        "oddsFormat": "decimal",
-    }
-
-    response = requests.get(endpoint, params=params)
-    if response.status_code == 429:
-        time.sleep(5)
-        response = requests.get(endpoint, params=params)
-    elif response.status_code == 404:
-        return []
-    elif response.status_code != 200:
-        return []
-
-    data = response.json()
+def parse_odds_api_event_odds(data: dict, event_id: str) -> List[EventOdds]:
     home_name = data["home_team"]
     away_name = data["away_team"]
 
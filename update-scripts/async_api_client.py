@@ -0,0 +1,197 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+import aiohttp
+from api_client import parse_odds_api_event_odds, parse_odds_api_score
+from config import (
+    ODDS_API_BURST,
+    ODDS_API_KEY,
+    ODDS_API_LOW_QUOTA_FRACTION,
+    ODDS_API_QUOTA_RESERVE,
+    ODDS_API_RATE_LIMIT,
+    ODDS_API_URL,
+    ODDS_BULK_MAX_AGE,
+)
+from models import Event, EventOdds
+from rate_limiter import QuotaTracker, RetryBudget, TokenBucket, backoff_delay
+
+# Odds API requests for the update coroutines, parsed with api_client.py
+
+ODDS_API_TIMEOUT = aiohttp.ClientTimeout(total=30)
+ODDS_API_MAX_ATTEMPTS = 4
+ODDS_API_BACKOFF_BASE = 1.0
+ODDS_API_BACKOFF_CAP = 60.0
+# rate limiting, server errors and dropped connections are worth retrying
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+session: Optional[aiohttp.ClientSession] = None
+
+# shared by every request, so concurrent updates respect the limits together
+rate_limiter = TokenBucket(ODDS_API_RATE_LIMIT, ODDS_API_BURST)
+retry_budget = RetryBudget(ratio=0.2, reserve=10)
+quota = QuotaTracker(ODDS_API_LOW_QUOTA_FRACTION, ODDS_API_QUOTA_RESERVE)
+
+
+@dataclass
+class BulkOdds:
+    """Odds of every upcoming event from one sport-level request"""
+
+    fetched_at: float
+    odds: Dict[str, List[EventOdds]]
+    # events whose odds were already handed out, so they aren't inserted twice
+    taken: Set[str] = field(default_factory=set)
+
+
+bulk_odds: Optional[BulkOdds] = None
+bulk_odds_lock = asyncio.Lock()
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Shared session, so requests reuse pooled connections"""
+    global session
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(timeout=ODDS_API_TIMEOUT)
+    return session
+
+
+async def close_session():
+    if session is not None:
+        await session.close()
+
+
+async def get_json(
+    endpoint: str, params: dict, urgent: bool = True
+) -> Optional[object]:
+    """GETs the endpoint within the rate limit, retrying transient failures
+    with backoff while the retry budget lasts, None unless it returns 200.
+
+    Non-urgent requests are refused once the quota is down to its reserve.
+    """
+    retry_budget.record_request()
+
+    # like requests, leave out unset parameters such as a missing api key
+    params = {key: value for key, value in params.items() if value is not None}
+
+    for attempt in range(ODDS_API_MAX_ATTEMPTS):
+        await rate_limiter.acquire()
+
+        # checked once the request may go, as other requests may have used
+        # quota while it waited
+        if not quota.allows(urgent):
+            print(
+                f"[odds_api] Skipping non-urgent request, "
+                f"{quota.remaining} requests remaining"
+            )
+            return None
+
+        retry_after = None
+        rate_limited = False
+        try:
+            async with get_session().get(endpoint, params=params) as response:
+                quota.update(response.headers)
+
+                if response.status == 200:
+                    return await response.json()
+                if response.status not in RETRYABLE_STATUSES:
+                    return None
+                retry_after = response.headers.get("Retry-After")
+                rate_limited = response.status == 429
+                error = f"status {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = repr(e)
+
+        if attempt + 1 == ODDS_API_MAX_ATTEMPTS or not retry_budget.try_retry():
+            print(f"[odds_api] Giving up on {endpoint} after {error}")
+            return None
+
+        delay = backoff_delay(
+            attempt, ODDS_API_BACKOFF_BASE, ODDS_API_BACKOFF_CAP, retry_after
+        )
+        print(f"[odds_api] {error} from {endpoint}, retrying in {delay:.1f}s")
+
+        # a 429 applies to every request, so hold them all back
+        if rate_limited:
+            rate_limiter.pause(delay)
+        await asyncio.sleep(delay)
+
+    return None
+
+
+async def get_game_status(days_from: int = 0) -> List[Event]:
+    endpoint = f"{ODDS_API_URL}/v4/sports/americanfootball_nfl/scores"
+
+    params = {"apiKey": ODDS_API_KEY}
+    if days_from > 0:
+        params["daysFrom"] = days_from
+
+    raw_events = await get_json(endpoint, params)
+    if raw_events is None:
+        return []
+
+    return [parse_odds_api_score(event) for event in raw_events]
+
+
+async def get_odds_api_event_odds(
+    event_id: str, urgent: bool = True
+) -> List[EventOdds]:
+    endpoint = f"{ODDS_API_URL}/v4/sports/americanfootball_nfl/events/{event_id}/odds"
+
+    params = {
+        "apiKey": ODDS_API_KEY,
+        "regions": "us",
+        "markets": "h2h",
+        "oddsFormat": "decimal",
+    }
+
+    data = await get_json(endpoint, params, urgent)
+    if data is None:
+        return []
+
+    return parse_odds_api_event_odds(data, event_id)
+
+
+async def get_odds_api_odds(
+    urgent: bool = True,
+) -> Optional[Dict[str, List[EventOdds]]]:
+    """Odds of every upcoming event by event id, in a single request"""
+    endpoint = f"{ODDS_API_URL}/v4/sports/americanfootball_nfl/odds"
+
+    params = {
+        "apiKey": ODDS_API_KEY,
+        "regions": "us",
+        "markets": "h2h",
+        "oddsFormat": "decimal",
+    }
+
+    data = await get_json(endpoint, params, urgent)
+    if data is None:
+        return None
+
+    return {
+        event["id"]: parse_odds_api_event_odds(event, event["id"]) for event in data
+    }
+
+
+async def get_bulk_event_odds(
+    event_id: str, max_age: float = ODDS_BULK_MAX_AGE, urgent: bool = True
+) -> List[EventOdds]:
+    """Odds of one event out of the sport-level odds, refetched when they are
+    more than max_age seconds old, so every event due in that window shares
+    one request"""
+    global bulk_odds
+
+    async with bulk_odds_lock:
+        if (
+            bulk_odds is None
+            or time.monotonic() - bulk_odds.fetched_at > max_age
+            or event_id in bulk_odds.taken
+        ):
+            odds = await get_odds_api_odds(urgent)
+            if odds is None:
+                return []
+            bulk_odds = BulkOdds(time.monotonic(), odds)
+
+        bulk_odds.taken.add(event_id)
+        return bulk_odds.odds.get(event_id, [])
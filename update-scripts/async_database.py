@@ -0,0 +1,89 @@
+from typing import List, Optional
+
+from async_db import pool
+from models import Event, EventOdds
+from psycopg.rows import dict_row
+
+
+def event_from_row(row: dict) -> Event:
+    return Event(
+        row["id"],
+        row["last_updated"],
+        row["season"],
+        row["home_team_id"],
+        row["away_team_id"],
+        row["commence_time"],
+        row["completed"],
+        row["home_score"],
+        row["away_score"],
+    )
+
+
+async def get_events(season: str) -> List[Event]:
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute("SELECT * FROM events WHERE season = %s", (season,))
+            events = [event_from_row(row) for row in await cursor.fetchall()]
+
+    return sorted(events, key=lambda x: x.commence_time)
+
+
+async def get_event(event_id: str) -> Optional[Event]:
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute("SELECT * FROM events WHERE id = %s", (event_id,))
+            row = await cursor.fetchone()
+
+    return event_from_row(row) if row else None
+
+
+async def update_events(events: List[Event]):
+
+    # updating commence time, completed, home_score, away_score, last_updated
+
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.executemany(
+                """UPDATE events 
+                SET commence_time = %s, 
+                    completed = %s, 
+                    home_score = %s, 
+                    away_score = %s, 
+                    last_updated = %s 
+                WHERE id = %s""",
+                [
+                    (
+                        event.commence_time,
+                        event.completed,
+                        event.home_score,
+                        event.away_score,
+                        event.last_updated,
+                        event.id,
+                    )
+                    for event in events
+                ],
+            )
+
+
+async def insert_event_odds(event_odds: List[EventOdds]):
+    """Inserts the odds in one pipelined batch and one commit"""
+    if not event_odds:
+        return
+
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.executemany(
+                "INSERT INTO event_odds (id, event_id, timestamp, home_odds, away_odds, sportsbook_key) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                [
+                    (
+                        odds.id,
+                        odds.event_id,
+                        odds.timestamp,
+                        odds.home_odds,
+                        odds.away_odds,
+                        odds.sportbook_key,
+                    )
+                    for odds in event_odds
+                ],
+            )
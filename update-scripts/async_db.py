@@ -0,0 +1,27 @@
+import os
+
+from dotenv import load_dotenv
+from psycopg_pool import AsyncConnectionPool
+
+load_dotenv()
+
+dbname = os.getenv("DB_DATABASE")
+user = os.getenv("DB_USER")
+password = os.getenv("DB_PASSWORD")
+host = os.getenv("DB_HOST")
+port = os.getenv("DB_PORT")
+
+
+# opened by main once the event loop is running
+pool = AsyncConnectionPool(
+    kwargs={
+        "dbname": dbname,
+        "user": user,
+        "password": password,
+        "host": host,
+        "port": port,
+    },
+    min_size=1,
+    max_size=20,
+    open=False,
+)
@@ -0,0 +1,56 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def bitsliced_sum(terms: np.ndarray) -> List[np.ndarray]:
+    """Adds up (terms x ... x words) bits per season with ripple-carry adders,
+    returning the bit planes of the sums, least significant first"""
+    planes: List[np.ndarray] = []
+    for carry in terms:
+        for k in range(len(planes)):
+            planes[k], carry = planes[k] ^ carry, planes[k] & carry
+        if carry.any():
+            planes.append(carry)
+    return planes
+
+
+def unpack_counts(planes: List[np.ndarray], n_seasons: int) -> np.ndarray:
+    """Turns (... x words) bit planes back into (... x seasons) counts"""
+    counts = None
+    for k, plane in enumerate(planes):
+        bits = np.unpackbits(plane.view(np.uint8), axis=-1, bitorder="little")
+        bits = bits[..., :n_seasons].astype(np.int64) << k
+        counts = bits if counts is None else counts + bits
+    return counts
+
+
+def win_counts(
+    packed: np.ndarray,
+    home: np.ndarray,
+    away: np.ndarray,
+    records: List[Tuple[int, np.ndarray]],
+    n_seasons: int,
+) -> np.ndarray:
+    """(seasons x records) wins of each (team, games) record over the packed
+    games, 64 seasons per operation.
+
+    packed is the (games x words) output of pack_seasons, whose bits are set
+    for a home win, home and away the team indices of each packed game, and
+    games the indices of the packed games each record counts.
+    """
+    max_games = max((len(games) for _, games in records), default=0)
+
+    # (games x records x words) words of each record's j-th game, set where the
+    # team won it, padded with zero words for records with fewer games
+    terms = np.zeros((max_games, len(records), packed.shape[1]), dtype=np.uint64)
+    for r, (team, games) in enumerate(records):
+        words = packed[games]
+        is_away = away[games] == team
+        words[is_away] = ~words[is_away]
+        terms[: len(games), r] = words
+
+    planes = bitsliced_sum(terms)
+    if not planes:
+        return np.zeros((n_seasons, len(records)), dtype=np.int64)
+    return unpack_counts(planes, n_seasons).T
@@ -6,3 +6,28 @@ load_dotenv()
 
 SEASON = os.getenv("SEASON", "2024")
 ODDS_API_KEY = os.getenv("ODDS_API_KEY")
+# point at a local fake server to exercise the client without using quota
+ODDS_API_URL = os.getenv("ODDS_API_URL", "https://api.the-odds-api.com")
+# client-side limit, in requests per second with bursts of up to ODDS_API_BURST
+ODDS_API_RATE_LIMIT = float(os.getenv("ODDS_API_RATE_LIMIT", "1"))
+ODDS_API_BURST = float(os.getenv("ODDS_API_BURST", "5"))
+# polls of events weeks away slow down below this fraction of the quota left,
+# and stop at ODDS_API_QUOTA_RESERVE requests left, keeping them for live games
+ODDS_API_LOW_QUOTA_FRACTION = float(os.getenv("ODDS_API_LOW_QUOTA_FRACTION", "0.25"))
+ODDS_API_QUOTA_RESERVE = int(os.getenv("ODDS_API_QUOTA_RESERVE", "100"))
+# odds updates in flight at once when several events are due together
+ODDS_UPDATE_CONCURRENCY = int(os.getenv("ODDS_UPDATE_CONCURRENCY", "8"))
+# fetch the odds of all events in one request and share it between due events,
+# instead of one request per event
+ODDS_BULK_FETCH = os.getenv("ODDS_BULK_FETCH", "true").lower() == "true"
+ODDS_BULK_MAX_AGE = float(os.getenv("ODDS_BULK_MAX_AGE", "60"))
+
+# season archives of each simulation group, on the volume mounted here by the
+# Dockerfile and docker-compose.yml so they survive redeploys
+SIMULATION_SAMPLES_DIR = os.getenv("SIMULATION_SAMPLES_DIR", "/data/simulation_samples")
+# archives of the newest this many groups are kept, older ones are deleted after
+# every run, 0 keeps them all. At a run every 6 hours 28 is a week, ~160 MB
+SIMULATION_ARCHIVE_RETENTION = int(os.getenv("SIMULATION_ARCHIVE_RETENTION", "28"))
+SIMULATION_SEED = os.getenv("SIMULATION_SEED")
+# when set, simulation runs are profiled with cProfile into this directory
+SIMULATION_PROFILE_DIR = os.getenv("SIMULATION_PROFILE_DIR")
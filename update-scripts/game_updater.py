@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from api_client import get_game_status
+from async_api_client import get_game_status
+from async_database import get_events, update_events
 from config import SEASON
-from database import get_events, update_events
 
 
 async def run_game_update(*args) -> Optional[datetime]:
@@ -12,7 +12,7 @@ async def run_game_update(*args) -> Optional[datetime]:
     # if game:
     #     return game.commence_time
 
-    upcoming_events = get_events(SEASON)
+    upcoming_events = await get_events(SEASON)
 
     sorted_events = sorted(upcoming_events, key=lambda x: x.commence_time)
 
@@ -28,10 +28,10 @@ async def run_game_update(*args) -> Optional[datetime]:
     # if we're before the next event, update in 1 day or when the event starts
     if now < next_event.commence_time:
         next_update = min(now + timedelta(days=1), next_event.commence_time)
-        game_updates = get_game_status()
+        game_updates = await get_game_status()
     else:
         next_update = now + timedelta(minutes=5)
-        game_updates = get_game_status(days_from=1)
+        game_updates = await get_game_status(days_from=1)
 
     events_to_update = []
 
@@ -41,6 +41,6 @@ async def run_game_update(*args) -> Optional[datetime]:
                 events_to_update.append(gu)
                 continue
 
-    update_events(events_to_update)
+    await update_events(events_to_update)
 
     return next_update
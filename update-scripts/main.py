@@ -1,13 +1,19 @@
 import asyncio
 import io
 import sys
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
-from config import SEASON
-from database import get_events
+from async_api_client import close_session
+from async_database import get_events
+from async_db import pool
+from config import ODDS_UPDATE_CONCURRENCY, SEASON
 from game_updater import run_game_update
 from odds_updater import run_odds_update
-from season_simulation_updater import run_season_simulation
+from season_simulation_updater import (
+    ensure_simulation_group_tables,
+    load_last_run_samples,
+    run_season_simulation,
+)
 from team_record_updater import run_team_record_update
 from update_queues import (
     GAME_UPDATE_QUEUE,
@@ -19,33 +25,59 @@ from update_queues import (
 
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, line_buffering=True)
 
+# when an update fails it is retried after this long, without holding up others
+UPDATE_RETRY_DELAY = timedelta(minutes=5)
+
 
-async def process_queue(queue, update_func):
+async def process_queue(queue, update_func, concurrency: int = 1):
     print(f"Starting {update_func.__name__} queue processing", flush=True)
-    while True:
-        now = datetime.now(timezone.utc)
-        next_event = queue.peek()
 
-        if next_event and next_event.val < now:
-            item = queue.pop()
-            next_update = await update_func(item.key)
+    # bounds the updates in flight, a slow update only holds up its own slot
+    slots = asyncio.Semaphore(concurrency)
+    in_flight = set()
 
+    async def update(item):
+        try:
+            next_update = await update_func(item.key)
+        except Exception as e:
+            next_update = datetime.now(timezone.utc) + UPDATE_RETRY_DELAY
+            print(
+                f"[{update_func.__name__}] Error updating event {item.key}: {e}, retrying at {next_update}"
+            )
+        else:
             print(
                 f"[{update_func.__name__}] Updated event {item.key if item.key != '' else ''} : next update {next_update}"
             )
+        finally:
+            slots.release()
 
-            if next_update:
-                queue.add(item.key, next_update)
-        await asyncio.sleep(1)
+        if next_update:
+            queue.add(item.key, next_update)
+
+    while True:
+        await queue.wait_until_due()
+
+        for item in queue.pop_due(datetime.now(timezone.utc)):
+            await slots.acquire()
+            task = asyncio.create_task(update(item))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
 
 
 async def main():
 
-    all_events = get_events(SEASON)
+    await pool.open()
+
+    await ensure_simulation_group_tables()
+    load_last_run_samples()
+
+    all_events = await get_events(SEASON)
 
     load_update_queue(all_events)
 
-    odds_task = asyncio.create_task(process_queue(ODDS_UPDATE_QUEUE, run_odds_update))
+    odds_task = asyncio.create_task(
+        process_queue(ODDS_UPDATE_QUEUE, run_odds_update, ODDS_UPDATE_CONCURRENCY)
+    )
     game_task = asyncio.create_task(process_queue(GAME_UPDATE_QUEUE, run_game_update))
     team_record_task = asyncio.create_task(
         process_queue(TEAM_RECORD_UPDATE_QUEUE, run_team_record_update)
@@ -53,7 +85,13 @@ async def main():
     season_simulation_task = asyncio.create_task(
         process_queue(SEASON_SIMULATION_QUEUE, run_season_simulation)
     )
-    await asyncio.gather(game_task, odds_task, team_record_task, season_simulation_task)
+    try:
+        await asyncio.gather(
+            game_task, odds_task, team_record_task, season_simulation_task
+        )
+    finally:
+        await close_session()
+        await pool.close()
 
 
 if __name__ == "__main__":
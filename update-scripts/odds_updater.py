@@ -1,12 +1,16 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from api_client import get_odds_api_event_odds
-from database import get_event, insert_event_odds
+from async_api_client import get_bulk_event_odds, get_odds_api_event_odds, quota
+from async_database import get_event, insert_event_odds
+from config import ODDS_BULK_FETCH
+
+# events more than a day away take their odds from any bulk fetch this recent
+UPCOMING_ODDS_MAX_AGE = timedelta(hours=1)
 
 
 async def run_odds_update(event_id: str) -> Optional[datetime]:
-    event = get_event(event_id)
+    event = await get_event(event_id)
 
     if not event:
         return None
@@ -14,18 +18,31 @@ async def run_odds_update(event_id: str) -> Optional[datetime]:
     if event.completed:
         return None
 
-    odds = get_odds_api_event_odds(event_id)
+    started = datetime.now(timezone.utc)
+
+    # polls of events weeks away give way to live games when quota runs low
+    urgent = started >= event.commence_time - timedelta(weeks=1)
+
+    if ODDS_BULK_FETCH:
+        if started < event.commence_time - timedelta(days=1):
+            odds = await get_bulk_event_odds(
+                event_id, UPCOMING_ODDS_MAX_AGE.total_seconds(), urgent
+            )
+        else:
+            odds = await get_bulk_event_odds(event_id, urgent=urgent)
+    else:
+        odds = await get_odds_api_event_odds(event_id, urgent)
 
     now = datetime.now(timezone.utc)
+    slowdown = 1.0 if urgent else quota.poll_interval_factor()
 
     if len(odds) == 0:
-        return now + timedelta(minutes=5)
+        return now + timedelta(minutes=5) * slowdown
 
-    for odd in odds:
-        insert_event_odds(odd)
+    await insert_event_odds(odds)
 
     if now < event.commence_time - timedelta(weeks=1):
-        return now + timedelta(days=1)
+        return now + timedelta(days=1) * slowdown
     elif now < event.commence_time - timedelta(days=1):
         return now + timedelta(hours=6)
     elif now < event.commence_time - timedelta(minutes=30):
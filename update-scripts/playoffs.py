@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Callable, List
+
+import numpy as np
+
+# probability the home team beats the away team, for arrays of team indices,
+# with no home advantage when the game is at a neutral site
+MatchupProbability = Callable[[np.ndarray, np.ndarray, bool], np.ndarray]
+
+# stages a seed can reach, numbered by how far it got
+PLAYOFF_STAGES: List[str] = ["divisional", "conference", "super_bowl", "champion"]
+
+
+@dataclass
+class RatingMatchups:
+    """Logistic matchup model, P(home win) = sigmoid(home - away + home_advantage)"""
+
+    ratings: np.ndarray
+    home_advantage: float
+
+    def __call__(self, home: np.ndarray, away: np.ndarray, neutral: bool):
+        logits = self.ratings[home] - self.ratings[away]
+        if not neutral:
+            logits = logits + self.home_advantage
+        return 1 / (1 + np.exp(-logits))
+
+    @classmethod
+    def fit(
+        cls,
+        n_teams: int,
+        home: np.ndarray,
+        away: np.ndarray,
+        home_win_probs: np.ndarray,
+    ) -> "RatingMatchups":
+        """Least squares fit of the ratings to the log odds of priced games"""
+        design = np.zeros((len(home), n_teams + 1))
+        design[np.arange(len(home)), home] += 1
+        design[np.arange(len(home)), away] -= 1
+        design[:, n_teams] = 1
+
+        probs = np.clip(home_win_probs, 1e-6, 1 - 1e-6)
+        coefficients = np.linalg.lstsq(design, np.log(probs / (1 - probs)), rcond=None)[
+            0
+        ]
+
+        return cls(coefficients[:n_teams], float(coefficients[n_teams]))
+
+
+def simulate_playoffs(
+    seeds: np.ndarray,
+    matchup_probability: MatchupProbability,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Plays the bracket of every simulated season at once.
+
+    seeds is a (simulations x conferences x 7) matrix of seeded team indices.
+    Returns the matching matrix of the stage each seed reached, 0 for losing
+    in the wild card round up to len(PLAYOFF_STAGES) for winning it all.
+    """
+    n_simulations = len(seeds)
+    stages = np.zeros(seeds.shape, dtype=np.int8)
+
+    def play(home_seeds: np.ndarray, away_seeds: np.ndarray) -> np.ndarray:
+        """Plays conference games between seed positions, returns the winners"""
+        home = np.take_along_axis(seeds, home_seeds[:, :, None], axis=2)[:, :, 0]
+        away = np.take_along_axis(seeds, away_seeds[:, :, None], axis=2)[:, :, 0]
+        home_wins = rng.random(home.shape) < matchup_probability(home, away, False)
+        winners = np.where(home_wins, home_seeds, away_seeds)[:, :, None]
+        reached = np.take_along_axis(stages, winners, axis=2) + 1
+        np.put_along_axis(stages, winners, reached, axis=2)
+        return winners[:, :, 0]
+
+    def seed(position: int) -> np.ndarray:
+        return np.full((n_simulations, 2), position)
+
+    # wild card round, the 1 seed has a bye
+    stages[:, :, 0] = 1
+    wild_card_winners = np.sort(
+        np.stack(
+            [play(seed(1), seed(6)), play(seed(2), seed(5)), play(seed(3), seed(4))],
+            axis=2,
+        ),
+        axis=2,
+    )
+
+    # divisional round, the 1 seed hosts the lowest remaining seed
+    divisional_winners = [
+        play(seed(0), wild_card_winners[:, :, 2]),
+        play(wild_card_winners[:, :, 0], wild_card_winners[:, :, 1]),
+    ]
+
+    # conference championships, hosted by the higher remaining seed
+    champions = play(np.minimum(*divisional_winners), np.maximum(*divisional_winners))
+
+    # super bowl at a neutral site
+    finalists = np.take_along_axis(seeds, champions[:, :, None], axis=2)[:, :, 0]
+    first_wins = rng.random(n_simulations) < matchup_probability(
+        finalists[:, 0], finalists[:, 1], True
+    )
+    winners = np.where(first_wins, champions[:, 0], champions[:, 1])
+    conferences = np.where(first_wins, 0, 1)
+    stages[np.arange(n_simulations), conferences, winners] += 1
+
+    return stages
+
+
+def playoff_stage_probabilities(
+    seeds: np.ndarray, stages: np.ndarray, weights: np.ndarray, n_teams: int
+) -> np.ndarray:
+    """(stages x teams) probability of every team reaching each of PLAYOFF_STAGES,
+    from samples with normalized weights"""
+    sample_weights = np.broadcast_to(weights[:, None, None], seeds.shape)
+
+    probabilities = np.zeros((len(PLAYOFF_STAGES), n_teams))
+    for i in range(len(PLAYOFF_STAGES)):
+        reached = stages >= i + 1
+        probabilities[i] = np.bincount(
+            seeds[reached], weights=sample_weights[reached], minlength=n_teams
+        )
+
+    return probabilities
@@ -0,0 +1,124 @@
+import asyncio
+import random
+import time
+from typing import Mapping, Optional
+
+
+class TokenBucket:
+    """Allows bursts of up to capacity requests, refilled at rate per second.
+
+    Shared by every caller of a client, so concurrent updates can't exceed the
+    provider's rate between them.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        # no tokens are handed out before this, set when the provider pushes back
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def refill(self, now: float):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self):
+        # the lock queues waiters, so they are served in order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+
+                wait = self.paused_until - now
+                if wait <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                if wait <= 0:
+                    wait = (1 - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RetryBudget:
+    """Allows retries in proportion to requests, so an outage can't turn every
+    request into max_attempts requests.
+
+    Every request deposits ratio of a retry, every retry withdraws one, and the
+    balance is capped at reserve.
+    """
+
+    def __init__(self, ratio: float, reserve: float):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = reserve
+
+    def record_request(self):
+        self.balance = min(self.reserve, self.balance + self.ratio)
+
+    def try_retry(self) -> bool:
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+def backoff_delay(
+    attempt: int, base: float, cap: float, retry_after: Optional[str] = None
+) -> float:
+    """Seconds to wait before retrying after the given failed attempt, counting
+    from 0. Exponential with full jitter, but never less than a Retry-After."""
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+
+    if retry_after is not None:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+
+    return delay
+
+
+class QuotaTracker:
+    """Request quota from the provider's x-requests-remaining and
+    x-requests-used response headers"""
+
+    def __init__(self, low_fraction: float, reserve: int):
+        # below this fraction of the quota left, non-urgent polls slow down
+        self.low_fraction = low_fraction
+        # at or below this many requests left, non-urgent requests are refused
+        self.reserve = reserve
+        self.remaining: Optional[int] = None
+        self.used: Optional[int] = None
+
+    def update(self, headers: Mapping[str, str]):
+        try:
+            if "x-requests-remaining" in headers:
+                self.remaining = int(float(headers["x-requests-remaining"]))
+            if "x-requests-used" in headers:
+                self.used = int(float(headers["x-requests-used"]))
+        except ValueError:
+            pass
+
+    @property
+    def remaining_fraction(self) -> float:
+        if self.remaining is None or self.used is None:
+            return 1.0
+        total = self.remaining + self.used
+        return self.remaining / total if total > 0 else 1.0
+
+    def allows(self, urgent: bool) -> bool:
+        return urgent or self.remaining is None or self.remaining > self.reserve
+
+    def poll_interval_factor(self) -> float:
+        """How much longer than usual to wait between non-urgent polls, 1 until
+        the quota runs low, then growing as it runs out"""
+        fraction = self.remaining_fraction
+        if fraction >= self.low_fraction:
+            return 1.0
+        return self.low_fraction / max(fraction, 0.01)
@@ -0,0 +1,65 @@
+from enum import Enum
+from typing import List
+
+import numpy as np
+from scipy.stats import qmc
+
+# independent scrambles per Sobol chunk, used as replicates to estimate variance
+SOBOL_REPLICATES = 8
+
+
+class SamplingStrategy(Enum):
+    PSEUDO_RANDOM = "pseudo_random"
+    ANTITHETIC = "antithetic"
+    SOBOL = "sobol"
+
+
+def sample_uniforms(
+    strategy: SamplingStrategy, n_samples: int, n_dims: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Returns a (n_samples x n_dims) matrix of uniforms drawn with strategy"""
+    if strategy == SamplingStrategy.PSEUDO_RANDOM or n_dims == 0:
+        return rng.random((n_samples, n_dims))
+
+    if strategy == SamplingStrategy.ANTITHETIC:
+        # rows 2k and 2k + 1 are a pair (u, 1 - u)
+        half = rng.random(((n_samples + 1) // 2, n_dims))
+        uniforms = np.empty((len(half) * 2, n_dims))
+        uniforms[0::2] = half
+        uniforms[1::2] = 1 - half
+        return uniforms[:n_samples]
+
+    if strategy == SamplingStrategy.SOBOL:
+        blocks = []
+        for size in _block_sizes(n_samples, SOBOL_REPLICATES):
+            if size == 0:
+                continue
+            sobol = qmc.Sobol(d=n_dims, scramble=True, seed=rng)
+            m = max(0, int(np.ceil(np.log2(size))))
+            blocks.append(sobol.random_base2(m)[:size])
+        return np.concatenate(blocks)
+
+    raise ValueError(f"Unknown sampling strategy {strategy}")
+
+
+def sampling_units(strategy: SamplingStrategy, n_samples: int) -> np.ndarray:
+    """Returns the independent unit each sample belongs to, sorted ascending.
+
+    Samples within a unit are correlated by construction (an antithetic pair,
+    one Sobol scramble), so variance is estimated from the spread between units.
+    """
+    if strategy == SamplingStrategy.ANTITHETIC:
+        return np.arange(n_samples) // 2
+
+    if strategy == SamplingStrategy.SOBOL:
+        sizes = _block_sizes(n_samples, SOBOL_REPLICATES)
+        return np.repeat(np.arange(len(sizes)), sizes)
+
+    return np.arange(n_samples)
+
+
+def _block_sizes(n_samples: int, n_blocks: int) -> List[int]:
+    return [
+        n_samples // n_blocks + (1 if i < n_samples % n_blocks else 0)
+        for i in range(n_blocks)
+    ]
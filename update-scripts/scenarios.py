@@ -0,0 +1,106 @@
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict
+
+import numpy as np
+from season_archive import SeasonArchive, archive_path, open_archive
+from simulation_samples import effective_sample_size, weighted_probabilities
+
+
+@dataclass
+class ScenarioResult:
+    n_simulations: int
+    effective_sample_size: float
+    make_playoffs: Dict[str, float]
+    win_division: Dict[str, float]
+    win_conference: Dict[str, float]
+
+
+@lru_cache(maxsize=4)
+def get_archive(simulation_group: int) -> SeasonArchive:
+    return open_archive(archive_path(simulation_group))
+
+
+def conditional_probabilities(
+    archive: SeasonArchive, fixed_outcomes: Dict[str, bool]
+) -> ScenarioResult:
+    """Probabilities given the outcomes of some games, from the archived seasons
+    where those games went that way. fixed_outcomes maps event ids to True for
+    a home win and False for an away win.
+
+    Only the fixed games are unpacked, and the seeds and weights are read from
+    the mapped archive at the matching seasons.
+    """
+    matches = np.ones(archive.n_simulations, dtype=bool)
+    remaining_events = set(archive.event_ids)
+
+    for event_id, home_win in fixed_outcomes.items():
+        if event_id in remaining_events:
+            matches &= archive.game_outcomes(event_id) == home_win
+        elif event_id in archive.completed_outcomes:
+            if archive.completed_outcomes[event_id] != (1 if home_win else -1):
+                raise ValueError(f"Event {event_id} was completed the other way")
+        else:
+            raise ValueError(f"Unknown event {event_id}")
+
+    matching = np.flatnonzero(matches)
+    weights = archive.weights[matching]
+    if weights.sum() == 0:
+        raise ValueError("No simulations match the scenario")
+    weights = weights / weights.sum()
+
+    probabilities = weighted_probabilities(
+        archive.seeds[matching], weights, len(archive.team_ids)
+    )
+
+    return ScenarioResult(
+        len(matching),
+        effective_sample_size(weights),
+        dict(zip(archive.team_ids, probabilities[0].tolist())),
+        dict(zip(archive.team_ids, probabilities[1].tolist())),
+        dict(zip(archive.team_ids, probabilities[2].tolist())),
+    )
+
+
+def query_scenario(
+    simulation_group: int, fixed_outcomes: Dict[str, bool]
+) -> ScenarioResult:
+    return conditional_probabilities(get_archive(simulation_group), fixed_outcomes)
+
+
+def parse_fixed_outcome(argument: str) -> tuple[str, bool]:
+    """Parses <event_id>=home|away"""
+    event_id, _, winner = argument.partition("=")
+    if winner not in ("home", "away"):
+        raise ValueError(f"Expected <event_id>=home|away, got {argument}")
+    return event_id, winner == "home"
+
+
+def print_scenario(result: ScenarioResult):
+    print(
+        f"{result.n_simulations} matching simulations, "
+        f"effective sample size {result.effective_sample_size:.0f}"
+    )
+    print(f"{'team':<40} {'playoffs':>9} {'division':>9} {'conference':>11}")
+    for team_id in sorted(
+        result.make_playoffs, key=lambda t: result.make_playoffs[t], reverse=True
+    ):
+        print(
+            f"{team_id:<40} {result.make_playoffs[team_id]:>9.3f} "
+            f"{result.win_division[team_id]:>9.3f} "
+            f"{result.win_conference[team_id]:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    # python scenarios.py <simulation_group> <event_id>=home|away ...
+    if len(sys.argv) < 2:
+        print("Usage: python scenarios.py <simulation_group> <event_id>=home|away ...")
+        sys.exit(1)
+
+    print_scenario(
+        query_scenario(
+            int(sys.argv[1]), dict(parse_fixed_outcome(a) for a in sys.argv[2:])
+        )
+    )
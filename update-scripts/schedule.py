@@ -0,0 +1,126 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+from season_results import to_bitmask
+
+
+@dataclass
+class CompiledSchedule:
+    """Integer-indexed view of a season's teams and events, built once per run"""
+
+    team_ids: List[str]
+    team_index: Dict[str, int]
+    event_ids: List[str]
+    event_index: Dict[str, int]
+
+    divisions: List[str]
+    conferences: List[str]
+
+    # per team
+    division_of: np.ndarray
+    conference_of: np.ndarray
+
+    # (divisions x teams) and (conferences x teams) membership
+    division_mask: np.ndarray
+    conference_mask: np.ndarray
+
+    # per event
+    home: np.ndarray
+    away: np.ndarray
+    is_division_game: np.ndarray
+    is_conference_game: np.ndarray
+
+    # bitmasks over event indices, for popcount queries on SeasonResults
+    team_game_masks: List[int]
+    division_game_mask: int
+    conference_game_mask: int
+
+    team_opponents: List[List[int]]
+    team_game_counts: List[int]
+
+    # least common multiple of the team game counts
+    games_lcm: int
+
+    @property
+    def n_teams(self) -> int:
+        return len(self.team_ids)
+
+    @property
+    def n_events(self) -> int:
+        return len(self.event_ids)
+
+    def games_between(self, teams: List[int]) -> int:
+        mask = 0
+        for i, t in enumerate(teams):
+            for u in teams[i + 1 :]:
+                mask |= self.team_game_masks[t] & self.team_game_masks[u]
+        return mask
+
+    def games_against(self, opponents: Iterable[int]) -> int:
+        mask = 0
+        for t in opponents:
+            mask |= self.team_game_masks[t]
+        return mask
+
+
+def compile_schedule(teams, events) -> CompiledSchedule:
+    team_ids = [team.id for team in teams]
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+
+    event_ids = [event.id for event in events]
+    event_index = {event_id: i for i, event_id in enumerate(event_ids)}
+
+    divisions = sorted(set(team.division for team in teams))
+    conferences = sorted(set(division.split(" ")[0] for division in divisions))
+
+    division_of = np.array(
+        [divisions.index(team.division) for team in teams], dtype=np.int64
+    )
+    conference_of = np.array(
+        [conferences.index(team.division.split(" ")[0]) for team in teams],
+        dtype=np.int64,
+    )
+
+    division_mask = division_of[None, :] == np.arange(len(divisions))[:, None]
+    conference_mask = conference_of[None, :] == np.arange(len(conferences))[:, None]
+
+    home = np.array([team_index[e.home_team_id] for e in events], dtype=np.int64)
+    away = np.array([team_index[e.away_team_id] for e in events], dtype=np.int64)
+
+    is_division_game = division_of[home] == division_of[away]
+    is_conference_game = conference_of[home] == conference_of[away]
+
+    team_game_masks = [
+        to_bitmask((home == t) | (away == t)) for t in range(len(team_ids))
+    ]
+    team_opponents = [
+        sorted(set(away[home == t].tolist()) | set(home[away == t].tolist()))
+        for t in range(len(team_ids))
+    ]
+
+    team_game_counts = [mask.bit_count() for mask in team_game_masks]
+
+    return CompiledSchedule(
+        team_ids=team_ids,
+        team_index=team_index,
+        event_ids=event_ids,
+        event_index=event_index,
+        divisions=divisions,
+        conferences=conferences,
+        division_of=division_of,
+        conference_of=conference_of,
+        division_mask=division_mask,
+        conference_mask=conference_mask,
+        home=home,
+        away=away,
+        is_division_game=is_division_game,
+        is_conference_game=is_conference_game,
+        team_game_masks=team_game_masks,
+        division_game_mask=to_bitmask(is_division_game),
+        conference_game_mask=to_bitmask(is_conference_game),
+        team_opponents=team_opponents,
+        team_game_counts=team_game_counts,
+        games_lcm=math.lcm(*team_game_counts),
+    )
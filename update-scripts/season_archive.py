@@ -0,0 +1,193 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from config import SIMULATION_SAMPLES_DIR
+from simulation_samples import SimulationSamples
+
+ARCHIVE_MAGIC = b"NFLSEASN"
+ARCHIVE_VERSION = 1
+# every array starts on a cache line, so memory mapped views are aligned
+ARCHIVE_ALIGNMENT = 64
+
+
+@dataclass
+class SeasonArchive:
+    """Simulated seasons of a simulation group, read through a memory map.
+
+    packed_outcomes is the (events x words) bit-packed outcome of each
+    remaining game, bit j of word w set for a home win in season 64 * w + j,
+    and seeds the (simulations x conferences x 7) int8 team indices of seeds
+    1-7. Both are views of the mapped file, so slicing them reads only the
+    pages that are touched.
+    """
+
+    team_ids: List[str]
+    event_ids: List[str]
+    completed_outcomes: Dict[str, int]
+    n_simulations: int
+    home_win_probs: np.ndarray
+    weights: np.ndarray
+    packed_outcomes: np.ndarray
+    seeds: np.ndarray
+    seed: Optional[int] = None
+
+    def outcomes(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """(seasons x events) outcomes of seasons start to stop, True for a home
+        win, unpacking only the words that hold them"""
+        stop = self.n_simulations if stop is None else min(stop, self.n_simulations)
+        if stop <= start:
+            return np.zeros((0, len(self.event_ids)), dtype=bool)
+
+        first_word, last_word = start // 64, (stop + 63) // 64
+        words = self.packed_outcomes[:, first_word:last_word]
+        bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder="little")
+
+        offset = first_word * 64
+        return bits[:, start - offset : stop - offset].T.astype(bool)
+
+    def game_outcomes(self, event_id: str) -> np.ndarray:
+        """Outcome of one remaining game in every season, True for a home win"""
+        words = self.packed_outcomes[self.event_ids.index(event_id)]
+        bits = np.unpackbits(words.view(np.uint8), bitorder="little")
+        return bits[: self.n_simulations].astype(bool)
+
+    def to_samples(self) -> SimulationSamples:
+        return SimulationSamples(
+            self.team_ids,
+            self.event_ids,
+            np.array(self.home_win_probs),
+            self.outcomes(),
+            np.array(self.seeds),
+            self.completed_outcomes,
+            np.array(self.weights),
+            self.seed,
+        )
+
+
+def pack_seasons(outcomes: np.ndarray) -> np.ndarray:
+    """Packs a (seasons x games) boolean matrix into (games x words) uint64s,
+    where bit j of word w is the outcome in season 64 * w + j"""
+    n_seasons, n_games = outcomes.shape
+    n_words = (n_seasons + 63) // 64
+
+    packed = np.zeros((n_words * 8, n_games), dtype=np.uint8)
+    packed[: (n_seasons + 7) // 8] = np.packbits(outcomes, axis=0, bitorder="little")
+    return np.ascontiguousarray(packed.T).view(np.uint64)
+
+
+def archive_path(simulation_group: int) -> str:
+    return os.path.join(SIMULATION_SAMPLES_DIR, f"{simulation_group}.seasons")
+
+
+def archived_groups() -> List[int]:
+    """Simulation groups with an archive, oldest first"""
+    if not os.path.isdir(SIMULATION_SAMPLES_DIR):
+        return []
+
+    groups = []
+    for filename in os.listdir(SIMULATION_SAMPLES_DIR):
+        name, extension = os.path.splitext(filename)
+        if extension == ".seasons" and name.isdigit():
+            groups.append(int(name))
+    return sorted(groups)
+
+
+def prune_archives(keep: int):
+    """Deletes the archives of all but the newest keep groups, 0 keeps them all"""
+    if keep <= 0:
+        return
+
+    for simulation_group in archived_groups()[:-keep]:
+        os.remove(archive_path(simulation_group))
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ARCHIVE_ALIGNMENT) * ARCHIVE_ALIGNMENT
+
+
+def save_archive(samples: SimulationSamples, path: str):
+    """Writes the samples as a season archive.
+
+    The file is the magic bytes, the little endian uint64 length of a JSON
+    header and the header, then each array at its offset in the header, counted
+    from the next aligned byte.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    arrays = {
+        "home_win_probs": np.ascontiguousarray(samples.home_win_probs, "<f8"),
+        "weights": np.ascontiguousarray(samples.normalized_weights(), "<f8"),
+        "packed_outcomes": pack_seasons(samples.outcomes),
+        "seeds": np.ascontiguousarray(samples.seeds, np.int8),
+    }
+
+    header = {
+        "version": ARCHIVE_VERSION,
+        "team_ids": samples.team_ids,
+        "event_ids": samples.event_ids,
+        "completed_outcomes": samples.completed_outcomes,
+        "n_simulations": samples.n_simulations,
+        "seed": samples.seed,
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode()
+    data_start = _aligned(len(ARCHIVE_MAGIC) + 8 + len(header_bytes))
+
+    # written next to the archive and moved into place, so readers mapping the
+    # archive never see it half written
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as outfile:
+        outfile.write(ARCHIVE_MAGIC)
+        outfile.write(len(header_bytes).to_bytes(8, "little"))
+        outfile.write(header_bytes)
+        for name, array in arrays.items():
+            outfile.seek(data_start + header["arrays"][name]["offset"])
+            outfile.write(memoryview(array).cast("B"))
+    os.replace(temporary_path, path)
+
+
+def open_archive(path: str) -> SeasonArchive:
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+
+    magic_length = len(ARCHIVE_MAGIC)
+    if bytes(data[:magic_length]) != ARCHIVE_MAGIC:
+        raise ValueError(f"{path} is not a season archive")
+
+    header_length = int.from_bytes(
+        bytes(data[magic_length : magic_length + 8]), "little"
+    )
+    header_start = magic_length + 8
+    header = json.loads(bytes(data[header_start : header_start + header_length]))
+    if header["version"] != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported season archive version {header['version']}")
+    data_start = _aligned(header_start + header_length)
+
+    def array(name: str) -> np.ndarray:
+        layout = header["arrays"][name]
+        dtype = np.dtype(layout["dtype"])
+        size = dtype.itemsize * int(np.prod(layout["shape"]))
+        start = data_start + layout["offset"]
+        return data[start : start + size].view(dtype).reshape(layout["shape"])
+
+    return SeasonArchive(
+        header["team_ids"],
+        header["event_ids"],
+        header["completed_outcomes"],
+        header["n_simulations"],
+        array("home_win_probs"),
+        array("weights"),
+        array("packed_outcomes"),
+        array("seeds"),
+        header.get("seed"),
+    )
@@ -0,0 +1,40 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def to_bitmask(flags: np.ndarray) -> int:
+    """Packs a boolean array into an int with bit i set when flags[i] is True"""
+    return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+class SeasonResults:
+    """Results of one simulated season as per-team bitmasks over event indices.
+
+    Bit i of wins[t] is set when team t won the event with index i in the
+    CompiledSchedule, so records over any set of games are popcounts of the
+    team's masks ANDed with a mask of those games.
+    """
+
+    __slots__ = ("wins", "losses", "ties")
+
+    def __init__(self, wins: List[int], losses: List[int], ties: List[int]):
+        self.wins = wins
+        self.losses = losses
+        self.ties = ties
+
+    def games(self, team: int) -> int:
+        return self.wins[team] | self.losses[team] | self.ties[team]
+
+    def win_total(self, team: int) -> float:
+        return self.wins[team].bit_count() + self.ties[team].bit_count() / 2
+
+    def win_pct(self, team: int) -> float:
+        return self.win_total(team) / self.games(team).bit_count()
+
+    def record(self, team: int, games: int) -> Tuple[float, int]:
+        """Returns the (wins + ties / 2, games played) of a team over a games mask"""
+        wins = (self.wins[team] & games).bit_count()
+        losses = (self.losses[team] & games).bit_count()
+        ties = (self.ties[team] & games).bit_count()
+        return wins + ties / 2, wins + losses + ties
@@ -1,16 +1,66 @@
+import asyncio
+import hashlib
 import json
-import random
-from dataclasses import dataclass
+import multiprocessing
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from functools import cmp_to_key
-from typing import List, Optional
-
-from average import RunningAverage
-from db import pool
-from psycopg2.extras import RealDictCursor
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Set
+
+import numpy as np
+from async_db import pool
+from bitsliced_records import win_counts
+from config import SIMULATION_ARCHIVE_RETENTION, SIMULATION_SEED
+from playoffs import (
+    PLAYOFF_STAGES,
+    RatingMatchups,
+    playoff_stage_probabilities,
+    simulate_playoffs,
+)
+from psycopg.rows import dict_row
+from sampling import SamplingStrategy, sample_uniforms, sampling_units
+from schedule import compile_schedule
+from season_archive import (
+    archive_path,
+    archived_groups,
+    open_archive,
+    pack_seasons,
+    prune_archives,
+    save_archive,
+)
+from season_results import SeasonResults, to_bitmask
+from simulation_profiling import StageTimings, print_profile, profiled
+from simulation_samples import (
+    SimulationSamples,
+    effective_sample_size,
+    game_leverage,
+    importance_weights,
+    seed_indicators,
+    weighted_probabilities,
+)
+from tiebreak_cache import CacheStats, TiebreakCache
+from win_totals import win_total_distributions, win_total_means, win_total_stds
 
 N_SIMULATIONS = 100000
+SIMULATION_BATCH_SIZE = 10000
+# each chunk of a batch has its own RNG substream, so a run is reproducible
+# from its seed whatever the number of workers
+SIMULATION_CHUNK_SIZE = 1000
+SIMULATION_TOLERANCE = 0.002
+SIMULATION_TIME_BUDGET = timedelta(minutes=5)
+SIMULATION_WORKERS = os.cpu_count() or 1
+SAMPLING_STRATEGY = SamplingStrategy.PSEUDO_RANDOM
+# off: keying a tie costs about as much as breaking it, so even at high hit
+# rates late in the season the cache made chunks slower
+TIEBREAK_CACHE_SIZE = 0
+# reuse the last run's samples until reweighting leaves fewer effective samples
+REWEIGHT_MIN_SAMPLE_FRACTION = 0.5
 CURRENT_SEASON = "2024"
 
 
@@ -46,27 +96,68 @@ class EventOdds:
     away_odds: float
 
 
+# samples of the last fresh run, reweighted when only the odds have moved,
+# reloaded from the latest archive on startup
+last_run_samples: Optional[SimulationSamples] = None
+
+
+class SimulationBackend(Enum):
+    # every season's standings from its per-team bitmasks
+    SCALAR = "scalar"
+    # division winners of a whole chunk from win, division and head-to-head
+    # records counted 64 seasons per uint64 word, the scalar tiebreakers only
+    # for ties those records don't break
+    BITSLICED = "bitsliced"
+
+
+SIMULATION_BACKEND = SimulationBackend.BITSLICED
+
+
 class RankingType(Enum):
     DIVISION = 1
     CONFERENCE = 2
 
 
-def load_data() -> tuple[List[Team], List[Event], List[EventOdds]]:
+async def load_data() -> (
+    tuple[List[Team], List[Event], List[EventOdds], List[EventOdds]]
+):
+    """Teams, events, the latest odds of each event and the latest odds of each
+    event from before its kickoff"""
 
-    conn = pool.getconn()
-
-    teams: List[Team] = []
-    events: List[Event] = []
-    odds: List[EventOdds] = []
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            # ordered, so team indices and the stored samples' seeds stay
+            # comparable between runs whatever order updates left the rows in
+            await cursor.execute(
+                "SELECT * FROM teams where season = %s ORDER BY id", (CURRENT_SEASON,)
+            )
+            db_teams = await cursor.fetchall()
 
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        # Execute a query
-        cursor.execute("SELECT * FROM teams where season = %s", (CURRENT_SEASON,))
+            await cursor.execute(
+                "SELECT * FROM events where season = %s ORDER BY id", (CURRENT_SEASON,)
+            )
+            db_events = await cursor.fetchall()
 
-        db_teams = cursor.fetchall()
+            await cursor.execute(
+                """SELECT DISTINCT ON (event_id) * FROM public.event_odds ORDER BY event_id, "timestamp" DESC;"""
+            )
+            db_odds = await cursor.fetchall()
+
+            # odds keep updating during games, so the latest row of a played
+            # game is an in-game price
+            await cursor.execute(
+                """SELECT DISTINCT ON (event_odds.event_id) event_odds.*
+                FROM public.event_odds
+                JOIN public.events ON events.id = event_odds.event_id
+                WHERE events.season = %s
+                    AND event_odds."timestamp" < events.commence_time
+                ORDER BY event_odds.event_id, event_odds."timestamp" DESC;""",
+                (CURRENT_SEASON,),
+            )
+            db_pregame_odds = await cursor.fetchall()
 
-    for team in db_teams:
-        new_team = Team(
+    teams = [
+        Team(
             team["id"],
             team["name"],
             team["division"],
@@ -75,16 +166,11 @@ def load_data() -> tuple[List[Team], List[Event], List[EventOdds]]:
             team["losses"],
             team["ties"],
         )
-        teams.append(new_team)
-
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        # Execute a query
-        cursor.execute("SELECT * FROM events where season = %s", (CURRENT_SEASON,))
+        for team in db_teams
+    ]
 
-        db_events = cursor.fetchall()
-
-    for event in db_events:
-        new_event = Event(
+    events = [
+        Event(
             event["id"],
             event["season"],
             event["home_team_id"],
@@ -94,30 +180,32 @@ def load_data() -> tuple[List[Team], List[Event], List[EventOdds]]:
             event["home_score"],
             event["away_score"],
         )
-        events.append(new_event)
+        for event in db_events
+    ]
 
-    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-        # Execute a query
-        cursor.execute(
-            """SELECT DISTINCT ON (event_id) * FROM public.event_odds ORDER BY event_id, "timestamp" DESC;"""
+    odds = [
+        EventOdds(
+            event_odd["id"],
+            event_odd["event_id"],
+            event_odd["timestamp"],
+            event_odd["home_odds"],
+            event_odd["away_odds"],
         )
+        for event_odd in db_odds
+    ]
 
-        db_odds = cursor.fetchall()
-
-    for event_odd in db_odds:
-        new_event = EventOdds(
+    pregame_odds = [
+        EventOdds(
             event_odd["id"],
             event_odd["event_id"],
             event_odd["timestamp"],
             event_odd["home_odds"],
             event_odd["away_odds"],
         )
+        for event_odd in db_pregame_odds
+    ]
 
-        odds.append(new_event)
-
-    pool.putconn(conn)
-
-    return teams, events, odds
+    return teams, events, odds, pregame_odds
 
 
 def compute_win_prob(home_odds: float, away_odds: float) -> tuple[float, float]:
@@ -131,64 +219,405 @@ def compute_win_prob(home_odds: float, away_odds: float) -> tuple[float, float]:
     return home_win_prob, away_win_prob
 
 
+def game_outcome(event: Event) -> int:
+    """1 for a home win, -1 for an away win and 0 for a tie"""
+    return int(np.sign(event.home_score - event.away_score))
+
+
+def input_fingerprint(events: List[Event], odds: List[EventOdds]) -> str:
+    """Hash of the simulation inputs that change during a season: the outcome of
+    every completed game and the latest prices of every game. Odds rows get a
+    new id whenever they are re-inserted, so only the prices are hashed."""
+    digest = hashlib.sha256()
+
+    for event in sorted(events, key=lambda e: e.id):
+        if event.completed:
+            digest.update(f"{event.id}:{game_outcome(event)};".encode())
+
+    for event_odds in sorted(odds, key=lambda eo: eo.event_id):
+        digest.update(
+            f"{event_odds.event_id}:"
+            f"{event_odds.home_odds}:{event_odds.away_odds};".encode()
+        )
+
+    return digest.hexdigest()
+
+
+def load_last_run_samples():
+    """Reloads the stored samples from the latest group's archive, so restarts
+    keep reweighting instead of starting with a fresh run"""
+    global last_run_samples
+
+    groups = archived_groups()
+    if not groups:
+        return
+
+    try:
+        samples = open_archive(archive_path(groups[-1])).to_samples()
+    except (OSError, ValueError) as e:
+        print(f"[run_season_simulation] Couldn't load the latest archive: {e}")
+        return
+
+    # reweighted groups archive the samples as drawn, with their weights, and
+    # reweighting starts from the sampling probabilities
+    last_run_samples = replace(samples, weights=None)
+    print(
+        f"[run_season_simulation] Loaded {samples.n_simulations} stored "
+        f"simulations of group {groups[-1]}"
+    )
+
+
+async def ensure_simulation_group_tables():
+    """Creates the per simulation group tables if they don't exist yet. Run once
+    at startup, the ALTERs lock tables the frontend reads even when they are
+    no-ops"""
+    async with pool.connection() as conn:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS nfl_season_simulation_group (
+                simulation_group integer PRIMARY KEY,
+                input_fingerprint text NOT NULL,
+                created_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+            ALTER TABLE nfl_season_simulation_group
+                ADD COLUMN IF NOT EXISTS seed bigint,
+                ADD COLUMN IF NOT EXISTS reweighted boolean,
+                ADD COLUMN IF NOT EXISTS stage_timings jsonb;
+            CREATE TABLE IF NOT EXISTS nfl_season_simulation_leverage (
+                simulation_group integer NOT NULL,
+                event_id text NOT NULL,
+                max_playoff_swing double precision NOT NULL,
+                playoff_swings jsonb NOT NULL,
+                PRIMARY KEY (simulation_group, event_id)
+            );
+            ALTER TABLE nfl_season_simulation
+                ADD COLUMN IF NOT EXISTS win_super_bowl_probability double precision,
+                ADD COLUMN IF NOT EXISTS playoff_stage_probabilities jsonb;
+            """)
+
+
+async def get_latest_input_fingerprint() -> Optional[str]:
+    """Input fingerprint of the latest simulation group, if it has one"""
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute("""
+                SELECT input_fingerprint FROM nfl_season_simulation_group
+                WHERE simulation_group = (
+                    SELECT max(simulation_group) FROM nfl_season_simulation
+                );
+                """)
+            db_result = await cursor.fetchone()
+
+    return db_result["input_fingerprint"] if db_result else None
+
+
 class NFLSimulation:
 
-    def __init__(self, teams, events, odds):
+    def __init__(
+        self,
+        teams,
+        events,
+        odds,
+        tiebreak_cache_size=TIEBREAK_CACHE_SIZE,
+    ):
         self.team_map = {team.id: team for team in teams}
         self.event_map = {event.id: event for event in events}
         self.event_odds_map = {eo.event_id: eo for eo in odds}
 
-    def simulate_season(self):
-        results_map = {}
+        self.tiebreak_cache = TiebreakCache(tiebreak_cache_size)
+        self.opponent_records_used = False
+        self.common_opponent_games: Dict[tuple, int] = {}
 
-        for team_id in self.team_map.keys():
-            results_map[team_id] = {"wins": [], "losses": [], "ties": []}
+        self.schedule = compile_schedule(teams, events)
+        self.team_ids = self.schedule.team_ids
+        self.team_index = self.schedule.team_index
 
-        for _, event in self.event_map.items():
+        self.completed_events = [e for e in self.event_map.values() if e.completed]
+        self.remaining_events = [e for e in self.event_map.values() if not e.completed]
+        self.remaining_event_indices = np.array(
+            [self.schedule.event_index[e.id] for e in self.remaining_events],
+            dtype=np.int64,
+        )
 
-            home_team_id = event.home_team_id
-            away_team_id = event.away_team_id
+        # every game draws from the same column of the uniforms whatever has
+        # been completed, so runs with the same seed share random numbers
+        event_streams = {
+            event_id: i for i, event_id in enumerate(sorted(self.event_map))
+        }
+        self.remaining_event_streams = np.array(
+            [event_streams[e.id] for e in self.remaining_events], dtype=np.int64
+        )
 
-            completed = event.completed
+        n_teams = len(self.team_ids)
 
-            if completed:
-                home_score = event.home_score
-                away_score = event.away_score
+        # results of the completed games are the same in every simulation
+        self.completed_results = SeasonResults(
+            [0] * n_teams, [0] * n_teams, [0] * n_teams
+        )
+        self.completed_wins = np.zeros(n_teams, dtype=np.int64)
+        self.completed_outcomes = {}
+
+        for event in self.completed_events:
+            bit = 1 << self.schedule.event_index[event.id]
+            home = self.team_index[event.home_team_id]
+            away = self.team_index[event.away_team_id]
+            self.completed_outcomes[event.id] = game_outcome(event)
+
+            if event.home_score > event.away_score:
+                self.completed_results.wins[home] |= bit
+                self.completed_results.losses[away] |= bit
+                self.completed_wins[home] += 1
+            elif event.away_score > event.home_score:
+                self.completed_results.losses[home] |= bit
+                self.completed_results.wins[away] |= bit
+                self.completed_wins[away] += 1
+            else:
+                self.completed_results.ties[home] |= bit
+                self.completed_results.ties[away] |= bit
+
+        is_remaining = np.zeros(self.schedule.n_events, dtype=bool)
+        is_remaining[self.remaining_event_indices] = True
+        self.remaining_mask = to_bitmask(is_remaining)
+        self.remaining_home_masks = [
+            to_bitmask(is_remaining & (self.schedule.home == t)) for t in range(n_teams)
+        ]
+        self.remaining_away_masks = [
+            to_bitmask(is_remaining & (self.schedule.away == t)) for t in range(n_teams)
+        ]
+
+        self.home_win_probs = np.array(
+            [
+                compute_win_prob(
+                    self.event_odds_map[e.id].home_odds,
+                    self.event_odds_map[e.id].away_odds,
+                )[0]
+                for e in self.remaining_events
+            ],
+            dtype=np.float64,
+        )
 
-                if home_score > away_score:
-                    results_map[home_team_id]["wins"].append(event.id)
-                    results_map[away_team_id]["losses"].append(event.id)
-                elif away_score > home_score:
-                    results_map[home_team_id]["losses"].append(event.id)
-                    results_map[away_team_id]["wins"].append(event.id)
-                else:
-                    results_map[home_team_id]["ties"].append(event.id)
-                    results_map[away_team_id]["ties"].append(event.id)
+        n_remaining = len(self.remaining_events)
+
+        # (teams x remaining games) probability of each team winning each game
+        remaining_games = np.arange(n_remaining)
+        self.team_win_probs = np.zeros((len(self.team_ids), n_remaining))
+        self.team_win_probs[
+            self.schedule.home[self.remaining_event_indices], remaining_games
+        ] = self.home_win_probs
+        self.team_win_probs[
+            self.schedule.away[self.remaining_event_indices], remaining_games
+        ] = (1 - self.home_win_probs)
+
+    def sample_outcomes(
+        self,
+        n_simulations: int,
+        rng: Optional[np.random.Generator] = None,
+        strategy: SamplingStrategy = SamplingStrategy.PSEUDO_RANDOM,
+    ) -> np.ndarray:
+        """Returns a (n_simulations x remaining games) matrix, True for a home win"""
+        if rng is None:
+            rng = np.random.default_rng()
+
+        uniforms = sample_uniforms(strategy, n_simulations, len(self.event_map), rng)
+        return uniforms[:, self.remaining_event_streams] <= self.home_win_probs
+
+    def samples_from_outcomes(
+        self, outcomes: np.ndarray, seeds: np.ndarray
+    ) -> SimulationSamples:
+        return SimulationSamples(
+            self.team_ids,
+            [e.id for e in self.remaining_events],
+            self.home_win_probs,
+            outcomes,
+            seeds,
+            self.completed_outcomes,
+        )
 
-                continue
+    def rating_matchups(self, pregame_odds: List[EventOdds]) -> RatingMatchups:
+        """Playoff matchup model fitted to the latest pregame odds of the
+        season's games"""
+        pregame_odds_map = {
+            eo.event_id: eo
+            for eo in pregame_odds
+            if eo.event_id in self.event_map
+            and eo.timestamp < self.event_map[eo.event_id].commence_time
+        }
+        priced_events = [
+            self.event_map[event_id] for event_id in sorted(pregame_odds_map)
+        ]
+
+        home = np.array(
+            [self.team_index[e.home_team_id] for e in priced_events], dtype=np.int64
+        )
+        away = np.array(
+            [self.team_index[e.away_team_id] for e in priced_events], dtype=np.int64
+        )
+        home_win_probs = np.array(
+            [
+                compute_win_prob(
+                    pregame_odds_map[e.id].home_odds,
+                    pregame_odds_map[e.id].away_odds,
+                )[0]
+                for e in priced_events
+            ]
+        )
 
-            event_odd = self.event_odds_map[event.id]
+        return RatingMatchups.fit(len(self.team_ids), home, away, home_win_probs)
+
+    def reweighting_probs(self, samples: SimulationSamples) -> Optional[np.ndarray]:
+        """Home win probabilities of the sampled games under the current results
+        and odds, or None when the samples can't be reweighted to them"""
+        if samples.team_ids != self.team_ids:
+            return None
+        if len(samples.event_ids) + len(samples.completed_outcomes) != len(
+            self.event_map
+        ):
+            return None
+
+        for event_id, outcome in samples.completed_outcomes.items():
+            event = self.event_map.get(event_id)
+            if event is None or not event.completed:
+                return None
+            if game_outcome(event) != outcome:
+                return None
+
+        remaining_probs = {
+            e.id: p for e, p in zip(self.remaining_events, self.home_win_probs)
+        }
 
-            home_odds = event_odd.home_odds
-            away_odds = event_odd.away_odds
+        # games completed since are certain, ties can't be reached by sampling
+        probs = np.zeros(len(samples.event_ids))
+        for g, event_id in enumerate(samples.event_ids):
+            event = self.event_map.get(event_id)
+            if event is None:
+                return None
+            if not event.completed:
+                probs[g] = remaining_probs[event_id]
+            elif game_outcome(event) == 0:
+                return None
+            else:
+                probs[g] = 1.0 if game_outcome(event) > 0 else 0.0
 
-            home_prob, away_prob = compute_win_prob(home_odds, away_odds)
+        return probs
 
-            is_home_win = random.random() <= home_prob
+    def results_from_outcomes(self, outcomes) -> SeasonResults:
+        is_home_win = np.zeros(self.schedule.n_events, dtype=bool)
+        is_home_win[self.remaining_event_indices] = outcomes
 
-            if is_home_win:
+        home_wins = to_bitmask(is_home_win)
+        away_wins = self.remaining_mask & ~home_wins
 
-                results_map[home_team_id]["wins"].append(event.id)
-                results_map[away_team_id]["losses"].append(event.id)
+        completed = self.completed_results
+        home_masks = self.remaining_home_masks
+        away_masks = self.remaining_away_masks
+        teams = range(len(self.team_ids))
 
-            else:
-                results_map[home_team_id]["losses"].append(event.id)
-                results_map[away_team_id]["wins"].append(event.id)
+        return SeasonResults(
+            [
+                completed.wins[t]
+                | (home_wins & home_masks[t])
+                | (away_wins & away_masks[t])
+                for t in teams
+            ],
+            [
+                completed.losses[t]
+                | (away_wins & home_masks[t])
+                | (home_wins & away_masks[t])
+                for t in teams
+            ],
+            list(completed.ties),
+        )
 
-        return results_map
+    def bitsliced_division_winners(
+        self, outcomes: np.ndarray, divisions: List[List[str]]
+    ) -> np.ndarray:
+        """(simulations x divisions) team index of every division winner, the
+        same as select_top_teams picks, or -1 where the tie needs more than the
+        head-to-head and division records.
+
+        Records of the remaining games are counted 64 seasons per word, and
+        every record is doubled, so ties count as a whole win.
+        """
+        n_simulations = len(outcomes)
+        rows = np.arange(n_simulations)
+
+        home = self.schedule.home[self.remaining_event_indices]
+        away = self.schedule.away[self.remaining_event_indices]
+        is_division_game = self.schedule.is_division_game[self.remaining_event_indices]
+
+        completed = self.completed_results
+        division_games = self.schedule.division_game_mask
+
+        # (team, remaining games) of every record, with its completed part
+        records = []
+        completed_scores = []
+        for division in divisions:
+            for team_id in division:
+                t = self.team_index[team_id]
+                plays = (home == t) | (away == t)
+                records.append((t, np.flatnonzero(plays)))
+                completed_scores.append(2 * completed.win_total(t))
+                records.append((t, np.flatnonzero(plays & is_division_game)))
+                completed_scores.append(2 * completed.record(t, division_games)[0])
+                for opponent_id in division:
+                    u = self.team_index[opponent_id]
+                    games = self.schedule.games_between([t, u])
+                    records.append(
+                        (t, np.flatnonzero(plays & ((home == u) | (away == u))))
+                    )
+                    completed_scores.append(2 * completed.record(t, games)[0])
+
+        scores = 2 * win_counts(
+            pack_seasons(outcomes), home, away, records, n_simulations
+        ) + np.array(completed_scores, dtype=np.int64)
+
+        winners = np.full((n_simulations, len(divisions)), -1, dtype=np.int64)
+        offset = 0
+        for d, division in enumerate(divisions):
+            n_teams = len(division)
+            indices = np.array([self.team_index[t] for t in division])
+            game_counts = np.array([self.schedule.team_game_counts[t] for t in indices])
+            # per team the win total, division record and head-to-head records
+            # against each team of the division
+            division_scores = scores[:, offset : offset + n_teams * (n_teams + 2)]
+            division_scores = division_scores.reshape(
+                n_simulations, n_teams, n_teams + 2
+            )
+            offset += n_teams * (n_teams + 2)
+
+            totals = division_scores[:, :, 0]
+            is_leader = totals == totals.max(axis=1)[:, None]
+            n_leaders = is_leader.sum(axis=1)
+            first = is_leader.argmax(axis=1)
+            second = n_teams - 1 - is_leader[:, ::-1].argmax(axis=1)
+
+            # a single leader wins, and three or more are ordered as listed
+            decided = n_leaders != 2
+            winners[decided, d] = indices[first[decided]]
+
+            # two leaders: head to head, then division win percentage
+            h2h_first = division_scores[rows, first, 2 + second]
+            h2h_second = division_scores[rows, second, 2 + first]
+            division_first = division_scores[rows, first, 1] * game_counts[second]
+            division_second = division_scores[rows, second, 1] * game_counts[first]
+
+            first_wins = ~decided & (
+                (h2h_first > h2h_second)
+                | ((h2h_first == h2h_second) & (division_first > division_second))
+            )
+            second_wins = ~decided & (
+                (h2h_second > h2h_first)
+                | ((h2h_first == h2h_second) & (division_second > division_first))
+            )
+            winners[first_wins, d] = indices[first[first_wins]]
+            winners[second_wins, d] = indices[second[second_wins]]
 
-    def get_wins(self, results, team_id):
-        return len(results[team_id]["wins"]) + (len(results[team_id]["ties"]) / 2)
+        return winners
+
+    def simulate_season(self, rng: Optional[np.random.Generator] = None):
+        return self.results_from_outcomes(self.sample_outcomes(1, rng)[0])
+
+    def get_wins(self, results: SeasonResults, team_id):
+        return results.win_total(self.team_index[team_id])
 
     def rank_by_wins(self, results, t1_id, t2_id):
         team_1_wins = self.get_wins(results, t1_id)
@@ -263,30 +692,13 @@ class NFLSimulation:
             # 3) common opponents
             # print(f"3) Common Opponents {', '.join([team_map[t].name for t in teams])}")
 
-            common_opponents = self.get_common_opponents(results, teams)
-
-            if len(common_opponents) > 0:
-                common_opponents_set = set(common_opponents)
-
-                common_opponent_wins = {t: 0.0 for t in teams}
-                for team in teams:
-                    common_wins = results[team]["wins"]
-                    common_ties = results[team]["ties"]
-
-                    for event_id in common_wins:
-                        event = self.event_map[event_id]
-                        if (
-                            event.home_team_id in common_opponents_set
-                            or event.away_team_id in common_opponents_set
-                        ):
-                            common_opponent_wins[team] += 1
-                    for event_id in common_ties:
-                        event = self.event_map[event_id]
-                        if (
-                            event.home_team_id in common_opponents_set
-                            or event.away_team_id in common_opponents_set
-                        ):
-                            common_opponent_wins[team] += 0.5
+            common_games = self.get_common_opponent_games(teams)
+
+            if common_games:
+                common_opponent_wins = {
+                    t: results.record(self.team_index[t], common_games)[0]
+                    for t in teams
+                }
                 max_wins = max(common_opponent_wins.values())
                 winning_teams = [
                     t for t in teams if common_opponent_wins[t] == max_wins
@@ -371,43 +783,149 @@ class NFLSimulation:
         else:
             return teams[0], teams[1:]
 
+    def get_tiebreak_signature(self, results: SeasonResults, teams, ranking_type):
+        """Key of the values the tiebreakers read for these teams, besides the
+        opponents' records: each team's record in the games among them, in
+        conference games and, for division ties, in division games and against
+        common opponents. Full seasons give every team the same number of
+        games in every simulation, so games played don't need to be keyed."""
+        if ranking_type == RankingType.DIVISION and len(teams) != 2:
+            # only two team division ties are broken by records
+            return ranking_type, tuple(teams)
+
+        indices = [self.team_index[t] for t in teams]
+        h2h_games = self.schedule.games_between(indices)
+        conference_games = self.schedule.conference_game_mask
+
+        if ranking_type == RankingType.CONFERENCE:
+            records = tuple(
+                (results.record(t, h2h_games), results.record(t, conference_games))
+                for t in indices
+            )
+        else:
+            division_games = self.schedule.division_game_mask
+            common_games = self.get_common_opponent_games(teams)
+            records = tuple(
+                (
+                    results.record(t, h2h_games),
+                    results.record(t, conference_games),
+                    results.record(t, division_games)[0],
+                    results.record(t, common_games)[0],
+                )
+                for t in indices
+            )
+
+        return ranking_type, tuple(teams), records
+
+    def get_opponent_signature(self, results: SeasonResults, teams):
+        # strength of victory / schedule also read which games the tied teams
+        # won and the records of every opponent
+        opponents = sorted(
+            set().union(
+                *[self.schedule.team_opponents[self.team_index[t]] for t in teams]
+            )
+        )
+        return (
+            tuple(results.wins[self.team_index[t]] for t in teams),
+            tuple(
+                (results.wins[o].bit_count(), results.ties[o].bit_count())
+                for o in opponents
+            ),
+        )
+
+    def get_common_opponent_games(self, teams) -> int:
+        """Mask of the games against the common opponents of teams, which only
+        depends on the schedule"""
+        key = tuple(teams)
+        if key not in self.common_opponent_games:
+            self.common_opponent_games[key] = self.schedule.games_against(
+                self.team_index[t] for t in self.get_common_opponents(teams)
+            )
+        return self.common_opponent_games[key]
+
+    def select_top_teams(
+        self,
+        season_results,
+        team_ids,
+        ranking_type: RankingType,
+        n_teams: int,
+        excluded: Set[str] = frozenset(),
+    ) -> List[str]:
+        """First n_teams of compute_rankings(team_ids) that aren't excluded.
+
+        Ties are only broken in the win groups that reach the cut line, and only
+        as far as needed, instead of ranking every team.
+        """
+        selected = []
+
+        # same order as sorting with rank_by_wins, reading each total once
+        wins = {t: self.get_wins(season_results, t) for t in team_ids}
+        teams_sorted_by_wins = sorted(team_ids, key=lambda t: -wins[t])
+
+        for _, group in groupby(teams_sorted_by_wins, key=lambda t: wins[t]):
+            group = list(group)
+            if excluded.issuperset(group):
+                continue
+
+            for t in self.iter_tie_order(season_results, group, ranking_type):
+                if t in excluded:
+                    continue
+                selected.append(t)
+                if len(selected) == n_teams:
+                    return selected
+
+        return selected
+
     def break_tie(self, results, teams, ranking_type):
-        if len(teams) == 1:
-            return teams
+        return list(self.iter_tie_order(results, teams, ranking_type))
 
-        if ranking_type == RankingType.DIVISION:
-            winner, losers = self.break_division_tie(results, teams, ranking_type)
-        elif ranking_type == RankingType.CONFERENCE:
-            winner, losers = self.break_conference_tie(results, teams)
+    def iter_tie_order(self, results, teams, ranking_type) -> Iterator[str]:
+        """Yields tied teams in order, breaking each step of the tie lazily"""
+        while len(teams) > 1:
+            winner, teams = self.break_tie_step(results, teams, ranking_type)
+            yield winner
+
+        yield from teams
+
+    def break_tie_step(self, results, teams, ranking_type):
+        if self.tiebreak_cache.maxsize <= 0:
+            return self.break_tie_uncached(results, teams, ranking_type)
 
-        return [winner] + self.break_tie(results, losers, ranking_type)
+        signature = self.get_tiebreak_signature(results, teams, ranking_type)
+        cached = self.tiebreak_cache.get(
+            signature, lambda: self.get_opponent_signature(results, teams)
+        )
+        if cached is not None:
+            return cached
+
+        self.opponent_records_used = False
+        winner, losers = self.break_tie_uncached(results, teams, ranking_type)
+
+        self.tiebreak_cache.put(
+            signature,
+            (winner, losers),
+            (
+                self.get_opponent_signature(results, teams)
+                if self.opponent_records_used
+                else None
+            ),
+        )
 
-    def get_h2h_winner(self, results, teams):
+        return winner, losers
 
-        teams_set = set(teams)
+    def break_tie_uncached(self, results, teams, ranking_type):
+        if ranking_type == RankingType.DIVISION:
+            return self.break_division_tie(results, teams, ranking_type)
+        return self.break_conference_tie(results, teams)
+
+    def get_h2h_winner(self, results: SeasonResults, teams):
+
+        h2h_games = self.schedule.games_between([self.team_index[t] for t in teams])
 
         team_h2h_win_pct = {t: 0.0 for t in teams}
 
         for team in teams:
-            wins = results[team]["wins"]
-            losses = results[team]["losses"]
-            ties = results[team]["ties"]
-            win_total = 0
-            total_games = 0
-            for win in wins:
-                event = self.event_map[win]
-                if event.home_team_id in teams_set and event.away_team_id in teams_set:
-                    win_total += 1
-                    total_games += 1
-            for tie in ties:
-                event = self.event_map[tie]
-                if event.home_team_id in teams_set and event.away_team_id in teams_set:
-                    win_total += 0.5
-                    total_games += 1
-            for loss in losses:
-                event = self.event_map[loss]
-                if event.home_team_id in teams_set and event.away_team_id in teams_set:
-                    total_games += 1
+            win_total, total_games = results.record(self.team_index[team], h2h_games)
 
             if total_games == 0:
                 team_h2h_win_pct[team] = 0
@@ -422,48 +940,23 @@ class NFLSimulation:
 
         return winners, losers
 
-    def get_division_win_pct(self, results, team_id):
-        division = self.team_map[team_id].division
-        wins = results[team_id]["wins"]
-        losses = results[team_id]["losses"]
-        ties = results[team_id]["ties"]
+    def get_division_win_pct(self, results: SeasonResults, team_id):
+        team = self.team_index[team_id]
 
-        total_games = len(wins) + len(losses) + len(ties)
-        division_wins = len(
-            [
-                eid
-                for eid in wins
-                if self.event_map[eid].home_team_id in division
-                and self.event_map[eid].away_team_id in division
-            ]
-        )
-        division_ties = len(
-            [
-                eid
-                for eid in ties
-                if self.event_map[eid].home_team_id in division
-                and self.event_map[eid].away_team_id in division
-            ]
-        )
-        score = division_wins + division_ties / 2
+        total_games = results.games(team).bit_count()
+        score, _ = results.record(team, self.schedule.division_game_mask)
         return score / total_games
 
-    def get_common_opponents(self, results, teams) -> List[str]:
+    def get_common_opponents(self, teams) -> List[str]:
 
-        teams_set = set(teams)
+        teams_set = set(self.team_index[t] for t in teams)
 
         team_opponents = {}
 
         for team in teams:
-            team_opponents[team] = set()
-            res = results[team]
-            games = res["wins"] + res["losses"] + res["ties"]
-            for event_id in games:
-                event = self.event_map[event_id]
-                if event.home_team_id == team and not event.away_team_id in teams_set:
-                    team_opponents[team].add(event.away_team_id)
-                elif event.away_team_id == team and not event.home_team_id in teams_set:
-                    team_opponents[team].add(event.home_team_id)
+            team_opponents[team] = set(
+                self.schedule.team_opponents[self.team_index[team]]
+            ).difference(teams_set)
 
         common_opponents = set()
 
@@ -473,30 +966,50 @@ class NFLSimulation:
             else:
                 common_opponents = common_opponents.intersection(team_opponents[team])
 
-        return list(common_opponents)
-
-    def get_win_pct(self, results, team_id):
-        wins = len(results[team_id]["wins"])
-        losses = len(results[team_id]["losses"])
-        ties = len(results[team_id]["ties"])
-        return (wins + ties / 2) / (wins + losses + ties)
+        return [self.team_ids[t] for t in common_opponents]
 
-    def get_strength_of_victory(self, results, teams) -> tuple[List[str], List[str]]:
+    def get_win_pct(self, results: SeasonResults, team_id):
+        return results.win_pct(self.team_index[team_id])
 
-        sovs = {t: RunningAverage() for t in teams}
+    def get_average_opponent_win_pct(
+        self, results: SeasonResults, team_id, games: int
+    ) -> float:
+        self.opponent_records_used = True
 
-        for team in teams:
-            wins = results[team]["wins"]
-
-            for event_id in wins:
-                event = self.event_map[event_id]
-                opposing_team = (
-                    event.away_team_id
-                    if event.home_team_id == team
-                    else event.home_team_id
+        # sum (wins + ties / 2) / games over opponents in integer units of
+        # 1 / (2 * games_lcm), so equal strengths compare equal regardless of
+        # the order the opponents are summed in
+        total = 0
+        n_games = 0
+        for opposing_team in self.schedule.team_opponents[self.team_index[team_id]]:
+            n = (games & self.schedule.team_game_masks[opposing_team]).bit_count()
+            if n == 0:
+                continue
+            total += (
+                n
+                * (
+                    2 * results.wins[opposing_team].bit_count()
+                    + results.ties[opposing_team].bit_count()
                 )
-                sovs[team].add(self.get_win_pct(results, opposing_team))
-        sovs_new = {t: sovs[t].get_average() for t in teams}
+                * self.schedule.games_lcm
+                // self.schedule.team_game_counts[opposing_team]
+            )
+            n_games += n
+
+        if n_games == 0:
+            return 0
+        return total / (2 * self.schedule.games_lcm * n_games)
+
+    def get_strength_of_victory(
+        self, results: SeasonResults, teams
+    ) -> tuple[List[str], List[str]]:
+
+        sovs_new = {
+            t: self.get_average_opponent_win_pct(
+                results, t, results.wins[self.team_index[t]]
+            )
+            for t in teams
+        }
 
         max_pct = max(sovs_new.values())
         winners = [t for t in teams if sovs_new[t] == max_pct]
@@ -504,24 +1017,16 @@ class NFLSimulation:
 
         return winners, losers
 
-    def get_strength_of_schedule(self, results, teams) -> tuple[List[str], List[str]]:
-
-        sovs = {t: RunningAverage() for t in teams}
+    def get_strength_of_schedule(
+        self, results: SeasonResults, teams
+    ) -> tuple[List[str], List[str]]:
 
-        for team in teams:
-            events = (
-                results[team]["wins"] + results[team]["losses"] + results[team]["ties"]
+        sovs_new = {
+            t: self.get_average_opponent_win_pct(
+                results, t, results.games(self.team_index[t])
             )
-
-            for event_id in events:
-                event = self.event_map[event_id]
-                opposing_team = (
-                    event.away_team_id
-                    if event.home_team_id == team
-                    else event.home_team_id
-                )
-                sovs[team].add(self.get_win_pct(results, opposing_team))
-        sovs_new = {t: sovs[t].get_average() for t in teams}
+            for t in teams
+        }
 
         max_pct = max(sovs_new.values())
         winners = [t for t in teams if sovs_new[t] == max_pct]
@@ -529,49 +1034,14 @@ class NFLSimulation:
 
         return winners, losers
 
-    def get_conference_record_results(self, results, teams):
-        conference = self.team_map[teams[0]].division.split(" ")[0]
+    def get_conference_record_results(self, results: SeasonResults, teams):
         winners = []
         losers = []
         records = {t: 0.0 for t in teams}
         for team in teams:
-            wins = results[team]["wins"]
-            losses = results[team]["losses"]
-            ties = results[team]["ties"]
-            score = 0
-            total_games = 0
-            for win in wins:
-                event = self.event_map[win]
-                home_conference = self.team_map[event.home_team_id].division.split(" ")[
-                    0
-                ]
-                away_conference = self.team_map[event.away_team_id].division.split(" ")[
-                    0
-                ]
-                if home_conference == conference and away_conference == conference:
-                    score += 1
-                    total_games += 1
-            for tie in ties:
-                event = self.event_map[tie]
-                home_conference = self.team_map[event.home_team_id].division.split(" ")[
-                    0
-                ]
-                away_conference = self.team_map[event.away_team_id].division.split(" ")[
-                    0
-                ]
-                if home_conference == conference and away_conference == conference:
-                    score += 0.5
-                    total_games += 1
-            for loss in losses:
-                event = self.event_map[loss]
-                home_conference = self.team_map[event.home_team_id].division.split(" ")[
-                    0
-                ]
-                away_conference = self.team_map[event.away_team_id].division.split(" ")[
-                    0
-                ]
-                if home_conference == conference and away_conference == conference:
-                    total_games += 1
+            score, total_games = results.record(
+                self.team_index[team], self.schedule.conference_game_mask
+            )
             if total_games == 0:
                 records[team] = 0
             else:
@@ -584,180 +1054,668 @@ class NFLSimulation:
         return winners, losers
 
 
-async def run_season_simulation(*args) -> Optional[datetime]:
-    now = datetime.now(timezone.utc)
+@dataclass
+class SimulationCounts:
+    n_simulations: int
+    make_playoffs: np.ndarray
+    win_division: np.ndarray
+    win_conference: np.ndarray
+
+    # sums of the per-unit means and squared means of the three probabilities,
+    # stacked as (3 x teams), used to estimate the variance of the estimates
+    n_units: int
+    unit_mean_sum: np.ndarray
+    unit_mean_sq_sum: np.ndarray
+
+    tiebreak_cache: CacheStats
+    stage_timings: StageTimings
+
+    @classmethod
+    def empty(cls, n_teams: int) -> "SimulationCounts":
+        return cls(
+            0,
+            np.zeros(n_teams, dtype=np.int64),
+            np.zeros(n_teams, dtype=np.int64),
+            np.zeros(n_teams, dtype=np.int64),
+            0,
+            np.zeros((3, n_teams)),
+            np.zeros((3, n_teams)),
+            CacheStats(),
+            StageTimings(),
+        )
 
-    # simulate the season
+    @classmethod
+    def from_seeds(
+        cls, seeds: np.ndarray, units: np.ndarray, n_teams: int
+    ) -> "SimulationCounts":
+        """Counts from a (simulations x conferences x 7) matrix of seeded team
+        indices, where units holds the independent sampling unit of each row"""
+        n_simulations = len(seeds)
+        if n_simulations == 0:
+            return cls.empty(n_teams)
+
+        indicators = seed_indicators(seeds, n_teams).astype(np.int64)
+
+        unit_starts = np.flatnonzero(np.r_[True, units[1:] != units[:-1]])
+        unit_sizes = np.diff(np.r_[unit_starts, n_simulations])
+        unit_means = (
+            np.add.reduceat(indicators, unit_starts, axis=0) / unit_sizes[:, None, None]
+        )
 
-    teams, events, odds = load_data()
-
-    nfc_teams = set([team.id for team in teams if team.division.startswith("NFC")])
-    afc_teams = set([team.id for team in teams if team.division.startswith("AFC")])
-
-    nfc_east_teams = set([team.id for team in teams if team.division == "NFC East"])
-    nfc_north_teams = set([team.id for team in teams if team.division == "NFC North"])
-    nfc_south_teams = set([team.id for team in teams if team.division == "NFC South"])
-    nfc_west_teams = set([team.id for team in teams if team.division == "NFC West"])
-    afc_east_teams = set([team.id for team in teams if team.division == "AFC East"])
-    afc_north_teams = set([team.id for team in teams if team.division == "AFC North"])
-    afc_south_teams = set([team.id for team in teams if team.division == "AFC South"])
-    afc_west_teams = set([team.id for team in teams if team.division == "AFC West"])
-
-    team_map = {team.id: team for team in teams}
-    event_map = {event.id: event for event in events}
-    event_odds_map = {eo.event_id: eo for eo in odds}
-
-    results = {
-        team_id: {
-            "win_conference": float(0),
-            "win_division": 0,
-            "make_playoffs": 0,
-            "expected_wins": RunningAverage(),
-            "wins": {w: 0 for w in range(0, 18)},
-        }
-        for team_id in team_map.keys()
-    }
+        totals = indicators.sum(axis=0)
+
+        return cls(
+            n_simulations,
+            totals[0],
+            totals[1],
+            totals[2],
+            len(unit_starts),
+            unit_means.sum(axis=0),
+            (unit_means**2).sum(axis=0),
+            CacheStats(),
+            StageTimings(),
+        )
 
-    simulation = NFLSimulation(teams, events, odds)
+    def estimator_variance(self) -> np.ndarray:
+        """Estimated variance of each (3 x teams) probability estimate"""
+        if self.n_units < 2:
+            return np.full(self.unit_mean_sum.shape, np.inf)
+
+        unit_variance = (
+            self.unit_mean_sq_sum - self.unit_mean_sum**2 / self.n_units
+        ) / (self.n_units - 1)
+        return np.maximum(unit_variance, 0) / self.n_units
+
+    def probabilities(self) -> np.ndarray:
+        """(3 x teams) make_playoffs, win_division and win_conference probabilities"""
+        return (
+            np.stack([self.make_playoffs, self.win_division, self.win_conference])
+            / self.n_simulations
+        )
 
-    for _ in range(N_SIMULATIONS):
+    def pseudo_random_variance(self) -> np.ndarray:
+        """Variance the same estimates would have with independent samples"""
+        probabilities = self.probabilities()
+        return probabilities * (1 - probabilities) / self.n_simulations
+
+    def max_standard_error(self) -> float:
+        if self.n_simulations == 0:
+            return float("inf")
+
+        return float(np.sqrt(self.estimator_variance().max()))
+
+    def variance_ratio(self) -> float:
+        """Estimated variance relative to independent sampling, lower is better"""
+        pseudo_random_variance = self.pseudo_random_variance().sum()
+        if pseudo_random_variance == 0:
+            return 1.0
+        return float(self.estimator_variance().sum() / pseudo_random_variance)
+
+    def merge(self, other: "SimulationCounts") -> "SimulationCounts":
+        return SimulationCounts(
+            self.n_simulations + other.n_simulations,
+            self.make_playoffs + other.make_playoffs,
+            self.win_division + other.win_division,
+            self.win_conference + other.win_conference,
+            self.n_units + other.n_units,
+            self.unit_mean_sum + other.unit_mean_sum,
+            self.unit_mean_sq_sum + other.unit_mean_sq_sum,
+            self.tiebreak_cache.merge(other.tiebreak_cache),
+            self.stage_timings.merge(other.stage_timings),
+        )
 
-        results_map = simulation.simulate_season()
 
-        for team_id, team_results in results_map.items():
-            n_wins = len(team_results["wins"])
-            results[team_id]["wins"][n_wins] += 1
-            results[team_id]["expected_wins"].add(len(team_results["wins"]))
+def simulate_chunk(
+    teams: List[Team],
+    events: List[Event],
+    odds: List[EventOdds],
+    n_simulations: int,
+    seed_sequence: np.random.SeedSequence,
+    strategy: SamplingStrategy = SamplingStrategy.PSEUDO_RANDOM,
+    backend: SimulationBackend = SimulationBackend.SCALAR,
+) -> tuple[SimulationCounts, SimulationSamples]:
+    """Runs n_simulations seasons with its own RNG stream, used by the process pool"""
+
+    # every chunk stream of a run descends from the run's seed
+    chunk_name = "chunk-" + "-".join(str(k) for k in seed_sequence.spawn_key)
+    with profiled(seed_sequence.entropy, chunk_name):
+        return simulate_seasons(
+            teams, events, odds, n_simulations, seed_sequence, strategy, backend
+        )
+
+
+def simulate_seasons(
+    teams: List[Team],
+    events: List[Event],
+    odds: List[EventOdds],
+    n_simulations: int,
+    seed_sequence: np.random.SeedSequence,
+    strategy: SamplingStrategy = SamplingStrategy.PSEUDO_RANDOM,
+    backend: SimulationBackend = SimulationBackend.SCALAR,
+) -> tuple[SimulationCounts, SimulationSamples]:
+    timings = StageTimings()
+
+    nfc_teams = sorted(team.id for team in teams if team.division.startswith("NFC"))
+    afc_teams = sorted(team.id for team in teams if team.division.startswith("AFC"))
+
+    nfc_east_teams = sorted(team.id for team in teams if team.division == "NFC East")
+    nfc_north_teams = sorted(team.id for team in teams if team.division == "NFC North")
+    nfc_south_teams = sorted(team.id for team in teams if team.division == "NFC South")
+    nfc_west_teams = sorted(team.id for team in teams if team.division == "NFC West")
+    afc_east_teams = sorted(team.id for team in teams if team.division == "AFC East")
+    afc_north_teams = sorted(team.id for team in teams if team.division == "AFC North")
+    afc_south_teams = sorted(team.id for team in teams if team.division == "AFC South")
+    afc_west_teams = sorted(team.id for team in teams if team.division == "AFC West")
+
+    # NFC divisions, then AFC
+    divisions = [
+        nfc_east_teams,
+        nfc_north_teams,
+        nfc_south_teams,
+        nfc_west_teams,
+        afc_east_teams,
+        afc_north_teams,
+        afc_south_teams,
+        afc_west_teams,
+    ]
+
+    simulation = NFLSimulation(teams, events, odds, TIEBREAK_CACHE_SIZE)
+    rng = np.random.default_rng(seed_sequence)
+
+    # sample every remaining game of every simulation at once
+    with timings.stage("sampling"):
+        outcomes = simulation.sample_outcomes(n_simulations, rng, strategy)
+
+    # -1 where the scalar tiebreakers pick the division winner
+    if backend is SimulationBackend.BITSLICED:
+        with timings.stage("division_rankings"):
+            bitsliced_winners = simulation.bitsliced_division_winners(
+                outcomes, divisions
+            )
+    else:
+        bitsliced_winners = np.full((n_simulations, len(divisions)), -1)
+
+    # team index of seeds 1-7, NFC then AFC
+    seeds = np.zeros((n_simulations, 2, 7), dtype=np.int8)
+
+    season_results_iter = timings.iterate(
+        "season_results", (simulation.results_from_outcomes(row) for row in outcomes)
+    )
+    for sim, season_results in enumerate(season_results_iter):
 
         # need to compute the rankings
 
-        nfc_east_winner = simulation.compute_rankings(
-            results_map, list(nfc_east_teams), RankingType.DIVISION
-        )[0]
-        nfc_north_winner = simulation.compute_rankings(
-            results_map, list(nfc_north_teams), RankingType.DIVISION
-        )[0]
-        nfc_south_winner = simulation.compute_rankings(
-            results_map, list(nfc_south_teams), RankingType.DIVISION
-        )[0]
-        nfc_west_winner = simulation.compute_rankings(
-            results_map, list(nfc_west_teams), RankingType.DIVISION
-        )[0]
-        afc_east_winner = simulation.compute_rankings(
-            results_map, list(afc_east_teams), RankingType.DIVISION
-        )[0]
-        afc_north_winner = simulation.compute_rankings(
-            results_map, list(afc_north_teams), RankingType.DIVISION
-        )[0]
-        afc_south_winner = simulation.compute_rankings(
-            results_map, list(afc_south_teams), RankingType.DIVISION
-        )[0]
-        afc_west_winner = simulation.compute_rankings(
-            results_map, list(afc_west_teams), RankingType.DIVISION
-        )[0]
+        division_started = time.perf_counter()
+
+        division_winners = [
+            (
+                simulation.team_ids[winner]
+                if winner >= 0
+                else simulation.select_top_teams(
+                    season_results, list(division), RankingType.DIVISION, 1
+                )[0]
+            )
+            for division, winner in zip(divisions, bitsliced_winners[sim])
+        ]
+        nfc_division_winners = division_winners[:4]
+        afc_division_winners = division_winners[4:]
+
+        conference_started = time.perf_counter()
+        timings.add("division_rankings", conference_started - division_started)
 
         nfc_conf_winner_rankings = simulation.compute_rankings(
-            results_map,
-            [nfc_east_winner, nfc_north_winner, nfc_south_winner, nfc_west_winner],
+            season_results,
+            nfc_division_winners,
             RankingType.CONFERENCE,
         )
         afc_conf_winner_rankings = simulation.compute_rankings(
-            results_map,
-            [afc_east_winner, afc_north_winner, afc_south_winner, afc_west_winner],
+            season_results,
+            afc_division_winners,
             RankingType.CONFERENCE,
         )
 
-        nfc_rankings = simulation.compute_rankings(
-            results_map, list(nfc_teams), RankingType.CONFERENCE
+        nfc_wildcard_rankings = simulation.select_top_teams(
+            season_results,
+            list(nfc_teams),
+            RankingType.CONFERENCE,
+            3,
+            set(nfc_conf_winner_rankings),
         )
-        nfc_wildcard_rankings = [
-            team_id
-            for team_id in nfc_rankings
-            if not team_id in nfc_conf_winner_rankings
-        ][:3]
 
-        afc_rankings = simulation.compute_rankings(
-            results_map, list(afc_teams), RankingType.CONFERENCE
+        afc_wildcard_rankings = simulation.select_top_teams(
+            season_results,
+            list(afc_teams),
+            RankingType.CONFERENCE,
+            3,
+            set(afc_conf_winner_rankings),
         )
-        afc_wildcard_rankings = [
-            team_id
-            for team_id in afc_rankings
-            if not team_id in afc_conf_winner_rankings
-        ][:3]
 
         nfc_final_rankings = nfc_conf_winner_rankings + nfc_wildcard_rankings
         afc_final_rankings = afc_conf_winner_rankings + afc_wildcard_rankings
 
-        for i in range(7):
+        timings.add("conference_rankings", time.perf_counter() - conference_started)
+
+        seeds[sim, 0] = [simulation.team_index[t] for t in nfc_final_rankings]
+        seeds[sim, 1] = [simulation.team_index[t] for t in afc_final_rankings]
+
+    with timings.stage("aggregation"):
+        counts = SimulationCounts.from_seeds(
+            seeds, sampling_units(strategy, n_simulations), len(simulation.team_ids)
+        )
+        samples = simulation.samples_from_outcomes(outcomes, seeds)
+    counts.tiebreak_cache = simulation.tiebreak_cache.stats
+    counts.stage_timings = timings
+
+    return counts, samples
+
+
+async def simulate_in_pool(
+    executor: ProcessPoolExecutor,
+    teams: List[Team],
+    events: List[Event],
+    odds: List[EventOdds],
+    n_simulations: int,
+    seed_sequence: np.random.SeedSequence,
+    strategy: SamplingStrategy = SamplingStrategy.PSEUDO_RANDOM,
+    backend: SimulationBackend = SimulationBackend.SCALAR,
+) -> tuple[SimulationCounts, SimulationSamples]:
+    chunk_sizes = [
+        min(SIMULATION_CHUNK_SIZE, n_simulations - start)
+        for start in range(0, n_simulations, SIMULATION_CHUNK_SIZE)
+    ]
+    seed_sequences = seed_sequence.spawn(len(chunk_sizes))
+
+    loop = asyncio.get_running_loop()
+
+    partials = await asyncio.gather(
+        *[
+            loop.run_in_executor(
+                executor,
+                simulate_chunk,
+                teams,
+                events,
+                odds,
+                size,
+                chunk_seed,
+                strategy,
+                backend,
+            )
+            for size, chunk_seed in zip(chunk_sizes, seed_sequences)
+        ]
+    )
+
+    counts = SimulationCounts.empty(len(teams))
+    for partial, _ in partials:
+        counts = counts.merge(partial)
+
+    return counts, SimulationSamples.concatenate([samples for _, samples in partials])
+
+
+async def simulate_until_converged(
+    teams: List[Team],
+    events: List[Event],
+    odds: List[EventOdds],
+    max_simulations: int = N_SIMULATIONS,
+    tolerance: float = SIMULATION_TOLERANCE,
+    time_budget: timedelta = SIMULATION_TIME_BUDGET,
+    seed_sequence: Optional[np.random.SeedSequence] = None,
+    strategy: SamplingStrategy = SAMPLING_STRATEGY,
+    backend: SimulationBackend = SIMULATION_BACKEND,
+) -> tuple[SimulationCounts, SimulationSamples]:
+    """Simulates in batches until every probability's standard error is below
+    tolerance, max_simulations have run or the time budget is used up"""
+
+    started = time.monotonic()
+    if seed_sequence is None:
+        seed_sequence = np.random.SeedSequence()
+    counts = SimulationCounts.empty(len(teams))
+    batches = []
+
+    # spawn, as forking once the event loop and aiohttp have started threads can
+    # deadlock the children. The workers import this module, whose db pool
+    # stays closed until main opens it
+    with ProcessPoolExecutor(
+        max_workers=SIMULATION_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        while counts.n_simulations < max_simulations:
+            batch_size = min(
+                SIMULATION_BATCH_SIZE, max_simulations - counts.n_simulations
+            )
+            batch, batch_samples = await simulate_in_pool(
+                executor,
+                teams,
+                events,
+                odds,
+                batch_size,
+                seed_sequence.spawn(1)[0],
+                strategy,
+                backend,
+            )
+            counts = counts.merge(batch)
+            batches.append(batch_samples)
+
+            standard_error = counts.max_standard_error()
+            elapsed = time.monotonic() - started
+
+            print(
+                f"[run_season_simulation] {counts.n_simulations} simulations "
+                f"({strategy.value}, {backend.value}), "
+                f"max standard error {standard_error:.5f}, "
+                f"variance ratio {counts.variance_ratio():.3f}, {elapsed:.1f}s elapsed, "
+                f"{counts.n_simulations / elapsed:.0f} seasons/s"
+            )
 
-            results[nfc_final_rankings[i]]["make_playoffs"] += 1
-            results[afc_final_rankings[i]]["make_playoffs"] += 1
-            if i < 4:
-                results[nfc_final_rankings[i]]["win_division"] += 1
-                results[afc_final_rankings[i]]["win_division"] += 1
+            if standard_error < tolerance:
+                break
+            if elapsed > time_budget.total_seconds():
+                break
+
+    return counts, SimulationSamples.concatenate(batches)
+
+
+async def compare_sampling_strategies(
+    teams: List[Team],
+    events: List[Event],
+    odds: List[EventOdds],
+    n_simulations: int = N_SIMULATIONS,
+) -> Dict[SamplingStrategy, SimulationCounts]:
+    """Runs the same number of simulations with every sampling strategy and
+    reports each one's estimated variance, for choosing SAMPLING_STRATEGY"""
+
+    results = {}
+    for strategy in SamplingStrategy:
+        started = time.monotonic()
+        counts, _ = await simulate_until_converged(
+            teams,
+            events,
+            odds,
+            max_simulations=n_simulations,
+            tolerance=0,
+            time_budget=timedelta.max,
+            strategy=strategy,
+        )
+        elapsed = time.monotonic() - started
 
-            if i == 0:
-                results[nfc_final_rankings[i]]["win_conference"] += 1
-                results[afc_final_rankings[i]]["win_conference"] += 1
+        variance = counts.estimator_variance()
+        print(
+            f"[compare_sampling_strategies] {strategy.value}: "
+            f"mean variance {variance.mean():.3e}, max variance {variance.max():.3e}, "
+            f"variance ratio {counts.variance_ratio():.3f}, {elapsed:.1f}s"
+        )
+        results[strategy] = counts
 
-    for team_id in team_map.keys():
-        results[team_id]["make_playoffs"] /= N_SIMULATIONS
-        results[team_id]["win_division"] /= N_SIMULATIONS
-        results[team_id]["win_conference"] /= N_SIMULATIONS
-        for i in results[team_id]["wins"].keys():
-            results[team_id]["wins"][i] /= N_SIMULATIONS
+    return results
 
-    try:
 
-        conn = pool.getconn()
+def reweight_samples(
+    simulation: NFLSimulation, samples: Optional[SimulationSamples]
+) -> Optional[SimulationSamples]:
+    """Stored samples reweighted to the current odds, or None when a fresh run
+    is needed"""
+    if samples is None:
+        return None
 
-        # 1) get simulation group
+    probs = simulation.reweighting_probs(samples)
+    if probs is None:
+        print("[run_season_simulation] Stored samples don't match results, resampling")
+        return None
 
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(
-                """select max(simulation_group) from nfl_season_simulation nss"""
+    weights = importance_weights(samples, probs)
+    sample_size = effective_sample_size(weights)
+
+    print(
+        f"[run_season_simulation] Reweighted {samples.n_simulations} stored "
+        f"simulations, effective sample size {sample_size:.0f}"
+    )
+
+    if sample_size < REWEIGHT_MIN_SAMPLE_FRACTION * samples.n_simulations:
+        return None
+
+    return replace(samples, weights=weights)
+
+
+async def run_season_simulation(*args) -> Optional[datetime]:
+    # a fixed SIMULATION_SEED gives every run common random numbers
+    seed = int(SIMULATION_SEED) if SIMULATION_SEED else secrets.randbits(63)
+
+    next_update = await simulate_season_group(seed)
+
+    print_profile(seed)
+
+    return next_update
+
+
+async def simulate_season_group(seed: int) -> Optional[datetime]:
+    global last_run_samples
+
+    now = datetime.now(timezone.utc)
+    timings = StageTimings()
+
+    # simulate the season
+
+    with timings.stage("load_data"):
+        teams, events, odds, pregame_odds = await load_data()
+
+    with timings.stage("fingerprint"):
+        simulation_seed, playoff_seed = np.random.SeedSequence(seed).spawn(2)
+
+        fingerprint = input_fingerprint(events, odds)
+        if fingerprint == await get_latest_input_fingerprint():
+            print(
+                "[run_season_simulation] Inputs unchanged since the last run, skipping"
             )
+            return now + timedelta(hours=6)
 
-            db_results = cursor.fetchone()
+    team_ids = [team.id for team in teams]
 
-            previous_simulation_group = int(db_results["max"])
+    simulation = NFLSimulation(teams, events, odds)
 
-        with conn.cursor() as cursor:
+    with profiled(seed, "run-reweighting"), timings.stage("reweighting"):
+        run_samples = reweight_samples(simulation, last_run_samples)
 
-            for team_id, team_results in results.items():
+    # summed over the workers, so these add up to more than the wall time
+    worker_timings = StageTimings()
 
-                cursor.execute(
-                    """
-                    INSERT INTO nfl_season_simulation
-                        (team_id, simulation_group, make_playoffs_probability, win_division_probability, win_conference_probability, n_simulations, expected_wins, expected_wins_std, win_total_probabilities)
-                    VALUES
-                        (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (simulation_group, team_id)
-                    DO UPDATE SET
-                        make_playoffs_probability = EXCLUDED.make_playoffs_probability,
-                        win_division_probability = EXCLUDED.win_division_probability,
-                        win_conference_probability = EXCLUDED.win_conference_probability,
-                        n_simulations = EXCLUDED.n_simulations,
-                        expected_wins = EXCLUDED.expected_wins,
-                        expected_wins_std = EXCLUDED.expected_wins_std,
-                        win_total_probabilities = EXCLUDED.win_total_probabilities,
-                        created_at = CURRENT_TIMESTAMP;
-                    """,
+    if run_samples is None:
+        print(f"[run_season_simulation] Simulating with seed {seed}")
+        with timings.stage("simulation"):
+            counts, last_run_samples = await simulate_until_converged(
+                teams, events, odds, seed_sequence=simulation_seed
+            )
+        last_run_samples = replace(last_run_samples, seed=seed)
+        run_samples = last_run_samples
+        worker_timings = counts.stage_timings
+
+        variance = counts.estimator_variance()
+        print(
+            f"[run_season_simulation] {SAMPLING_STRATEGY.value} sampling: "
+            f"mean variance {variance.mean():.3e}, max variance {variance.max():.3e}"
+        )
+        if counts.tiebreak_cache.lookups > 0:
+            print(
+                f"[run_season_simulation] Tiebreak cache: {counts.tiebreak_cache.hits} "
+                f"hits / {counts.tiebreak_cache.lookups} lookups "
+                f"({counts.tiebreak_cache.hit_rate:.1%} hit rate)"
+            )
+
+    # the stages that don't await, profiling across an await would also
+    # record the other update coroutines
+    with profiled(seed, "run-results"):
+        with timings.stage("aggregation"):
+            weights = run_samples.normalized_weights()
+            probabilities = weighted_probabilities(
+                run_samples.seeds, weights, len(team_ids)
+            )
+            n_simulations = round(effective_sample_size(weights))
+
+        # play out the bracket of every simulated season
+        with timings.stage("playoffs"):
+            stages = simulate_playoffs(
+                run_samples.seeds,
+                simulation.rating_matchups(pregame_odds),
+                np.random.default_rng(playoff_seed),
+            )
+            stage_probabilities = playoff_stage_probabilities(
+                run_samples.seeds, stages, weights, len(team_ids)
+            )
+
+        # swing in each team's playoff probability from each remaining game
+        with timings.stage("leverage"):
+            leverage = game_leverage(run_samples)
+
+        # win totals are exact, only the standings need the simulation
+        with timings.stage("win_totals"):
+            win_total_probabilities = win_total_distributions(
+                simulation.completed_wins, simulation.team_win_probs
+            )
+            expected_wins = win_total_means(
+                simulation.completed_wins, simulation.team_win_probs
+            )
+            expected_wins_std = win_total_stds(simulation.team_win_probs)
+
+    results = {}
+    for i, team_id in enumerate(team_ids):
+        results[team_id] = {
+            "win_conference": float(probabilities[2, i]),
+            "win_division": float(probabilities[1, i]),
+            "make_playoffs": float(probabilities[0, i]),
+            "expected_wins": float(expected_wins[i]),
+            "expected_wins_std": float(expected_wins_std[i]),
+            "wins": {w: float(win_total_probabilities[i, w]) for w in range(0, 18)},
+            "playoff_stages": {
+                stage: float(stage_probabilities[k, i])
+                for k, stage in enumerate(PLAYOFF_STAGES)
+            },
+        }
+
+    upsert_started = time.perf_counter()
+
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cursor:
+
+            # 1) get simulation group
+
+            await cursor.execute(
+                """select max(simulation_group) from nfl_season_simulation nss"""
+            )
+
+            db_results = await cursor.fetchone()
+
+            simulation_group = int(db_results["max"]) + 1
+
+            await cursor.execute(
+                """
+                INSERT INTO nfl_season_simulation_group
+                    (simulation_group, input_fingerprint, seed, reweighted)
+                VALUES
+                    (%s, %s, %s, %s)
+                ON CONFLICT (simulation_group)
+                DO UPDATE SET
+                    input_fingerprint = EXCLUDED.input_fingerprint,
+                    seed = EXCLUDED.seed,
+                    reweighted = EXCLUDED.reweighted,
+                    created_at = CURRENT_TIMESTAMP;
+                """,
+                # a reweighted group reuses the seasons drawn by an earlier seed
+                (
+                    simulation_group,
+                    fingerprint,
+                    run_samples.seed,
+                    run_samples.weights is not None,
+                ),
+            )
+
+            await cursor.executemany(
+                """
+                INSERT INTO nfl_season_simulation
+                    (team_id, simulation_group, make_playoffs_probability, win_division_probability, win_conference_probability, n_simulations, expected_wins, expected_wins_std, win_total_probabilities, win_super_bowl_probability, playoff_stage_probabilities)
+                VALUES
+                    (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (simulation_group, team_id)
+                DO UPDATE SET
+                    make_playoffs_probability = EXCLUDED.make_playoffs_probability,
+                    win_division_probability = EXCLUDED.win_division_probability,
+                    win_conference_probability = EXCLUDED.win_conference_probability,
+                    n_simulations = EXCLUDED.n_simulations,
+                    expected_wins = EXCLUDED.expected_wins,
+                    expected_wins_std = EXCLUDED.expected_wins_std,
+                    win_total_probabilities = EXCLUDED.win_total_probabilities,
+                    win_super_bowl_probability = EXCLUDED.win_super_bowl_probability,
+                    playoff_stage_probabilities = EXCLUDED.playoff_stage_probabilities,
+                    created_at = CURRENT_TIMESTAMP;
+                """,
+                [
                     (
                         team_id,
-                        previous_simulation_group + 1,
+                        simulation_group,
                         team_results["make_playoffs"],
                         team_results["win_division"],
                         team_results["win_conference"],
-                        N_SIMULATIONS,
-                        team_results["expected_wins"].get_average(),
-                        team_results["expected_wins"].get_standard_deviation(),
+                        n_simulations,
+                        team_results["expected_wins"],
+                        team_results["expected_wins_std"],
                         json.dumps(team_results["wins"]),
-                    ),
-                )
-            conn.commit()
+                        team_results["playoff_stages"]["champion"],
+                        json.dumps(team_results["playoff_stages"]),
+                    )
+                    for team_id, team_results in results.items()
+                ],
+            )
+
+            await cursor.executemany(
+                """
+                INSERT INTO nfl_season_simulation_leverage
+                    (simulation_group, event_id, max_playoff_swing, playoff_swings)
+                VALUES
+                    (%s, %s, %s, %s)
+                ON CONFLICT (simulation_group, event_id)
+                DO UPDATE SET
+                    max_playoff_swing = EXCLUDED.max_playoff_swing,
+                    playoff_swings = EXCLUDED.playoff_swings;
+                """,
+                [
+                    (
+                        simulation_group,
+                        event_id,
+                        float(np.abs(leverage[g]).max()),
+                        json.dumps(dict(zip(team_ids, leverage[g].tolist()))),
+                    )
+                    for g, event_id in enumerate(run_samples.event_ids)
+                    if not simulation.event_map[event_id].completed
+                ],
+            )
+
+            timings.add("upsert", time.perf_counter() - upsert_started)
+            stage_timings = {
+                **timings.as_dict(),
+                **worker_timings.as_dict(prefix="workers."),
+            }
+
+            await cursor.execute(
+                """
+                UPDATE nfl_season_simulation_group
+                SET stage_timings = %s
+                WHERE simulation_group = %s;
+                """,
+                (json.dumps(stage_timings), simulation_group),
+            )
+
+    print(
+        "[run_season_simulation] Stage timings "
+        + json.dumps(
+            {
+                "simulation_group": simulation_group,
+                "seed": run_samples.seed,
+                "reweighted": run_samples.weights is not None,
+                "n_simulations": n_simulations,
+                "stage_seconds": stage_timings,
+            }
+        )
+    )
 
-    finally:
-        pool.putconn(conn)
+    # kept for audits and scenario queries against this group, for the newest
+    # SIMULATION_ARCHIVE_RETENTION groups
+    save_archive(run_samples, archive_path(simulation_group))
+    prune_archives(SIMULATION_ARCHIVE_RETENTION)
 
     return now + timedelta(hours=6)
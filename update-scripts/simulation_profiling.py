@@ -0,0 +1,94 @@
+import cProfile
+import glob
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+from config import SIMULATION_PROFILE_DIR
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageTimings:
+    """Seconds spent in each named stage, mergeable across workers"""
+
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, stage: str, seconds: float):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yields from iterable, timing only the work of producing each item"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def merge(self, other: "StageTimings") -> "StageTimings":
+        merged = StageTimings(dict(self.seconds))
+        for name, seconds in other.seconds.items():
+            merged.add(name, seconds)
+        return merged
+
+    def as_dict(self, prefix: str = "") -> Dict[str, float]:
+        return {prefix + name: round(s, 6) for name, s in self.seconds.items()}
+
+
+def profile_dir(run_id: int) -> Optional[str]:
+    if not SIMULATION_PROFILE_DIR:
+        return None
+    return os.path.join(SIMULATION_PROFILE_DIR, str(run_id))
+
+
+@contextmanager
+def profiled(run_id: int, name: str) -> Iterator[None]:
+    """Runs the block under cProfile when SIMULATION_PROFILE_DIR is set, saving
+    the stats as {SIMULATION_PROFILE_DIR}/{run_id}/{name}.prof.
+
+    cProfile records everything that runs on the thread, so in a coroutine the
+    block must not await, or the other coroutines show up in the profile.
+    """
+    directory = profile_dir(run_id)
+    if directory is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(directory, f"{name}.prof"))
+
+
+def print_profile(run_id: int, limit: int = 25):
+    """Prints the slowest functions of every profile saved for the run, the
+    run's own process and its workers combined"""
+    directory = profile_dir(run_id)
+    if directory is None:
+        return
+
+    paths = sorted(glob.glob(os.path.join(directory, "*.prof")))
+    if not paths:
+        return
+
+    print(f"[profile] {len(paths)} profiles in {directory}")
+    pstats.Stats(*paths).sort_stats("cumulative").print_stats(limit)
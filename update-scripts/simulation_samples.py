@@ -0,0 +1,133 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class SimulationSamples:
+    """Sampled outcomes of a run and the probabilities they were drawn under.
+
+    outcomes is a (simulations x events) matrix, True for a home win, over the
+    games that were remaining when the run was made, and seeds is the matching
+    (simulations x conferences x 7) matrix of seeded team indices.
+    completed_outcomes holds the result of every game that was already
+    completed, 1 for a home win, -1 for an away win and 0 for a tie.
+    weights are the normalized importance weights of reweighted samples, None
+    when they are used as drawn, and seed the run seed that drew them.
+    """
+
+    team_ids: List[str]
+    event_ids: List[str]
+    home_win_probs: np.ndarray
+    outcomes: np.ndarray
+    seeds: np.ndarray
+    completed_outcomes: Dict[str, int]
+    weights: Optional[np.ndarray] = None
+    seed: Optional[int] = None
+
+    @property
+    def n_simulations(self) -> int:
+        return len(self.outcomes)
+
+    def normalized_weights(self) -> np.ndarray:
+        if self.weights is None:
+            return np.full(self.n_simulations, 1 / self.n_simulations)
+        return self.weights
+
+    @classmethod
+    def concatenate(cls, samples: List["SimulationSamples"]) -> "SimulationSamples":
+        first = samples[0]
+        return cls(
+            first.team_ids,
+            first.event_ids,
+            first.home_win_probs,
+            np.concatenate([s.outcomes for s in samples]),
+            np.concatenate([s.seeds for s in samples]),
+            first.completed_outcomes,
+            seed=first.seed,
+        )
+
+
+def seed_indicators(seeds: np.ndarray, n_teams: int) -> np.ndarray:
+    """(simulations x 3 x teams) make_playoffs, win_division and win_conference
+    indicators from a (simulations x conferences x 7) matrix of seeds"""
+    n_simulations = len(seeds)
+    rows = np.arange(n_simulations)[:, None]
+
+    indicators = np.zeros((n_simulations, 3, n_teams), dtype=bool)
+    indicators[rows, 0, seeds.reshape(n_simulations, -1)] = True
+    indicators[rows, 1, seeds[:, :, :4].reshape(n_simulations, -1)] = True
+    indicators[rows, 2, seeds[:, :, 0]] = True
+
+    return indicators
+
+
+def importance_weights(
+    samples: SimulationSamples, home_win_probs: np.ndarray
+) -> np.ndarray:
+    """Likelihood ratio of every sample under new home win probabilities,
+    normalized to sum to 1, or all zeros when no sample is possible under them.
+
+    Only games whose probability changed contribute, so small odds updates cost
+    a pass over a few columns of the outcome matrix.
+    """
+    log_weights = np.zeros(samples.n_simulations)
+
+    changed = np.flatnonzero(home_win_probs != samples.home_win_probs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for g in changed:
+            new, old = home_win_probs[g], samples.home_win_probs[g]
+            log_weights += np.where(
+                samples.outcomes[:, g],
+                np.log(new) - np.log(old),
+                np.log1p(-new) - np.log1p(-old),
+            )
+
+    if not np.isfinite(log_weights.max()):
+        return np.zeros(samples.n_simulations)
+
+    weights = np.exp(log_weights - log_weights.max())
+    return weights / weights.sum()
+
+
+def effective_sample_size(weights: np.ndarray) -> float:
+    """Kish effective sample size of normalized weights"""
+    sum_of_squares = (weights**2).sum()
+    return float(1 / sum_of_squares) if sum_of_squares > 0 else 0.0
+
+
+def weighted_probabilities(
+    seeds: np.ndarray, weights: np.ndarray, n_teams: int
+) -> np.ndarray:
+    """(3 x teams) make_playoffs, win_division and win_conference probabilities
+    of samples with normalized weights"""
+    return np.tensordot(weights, seed_indicators(seeds, n_teams), axes=(0, 0))
+
+
+def game_leverage(samples: SimulationSamples, chunk_size: int = 10000) -> np.ndarray:
+    """(events x teams) swing in every team's playoff probability between a home
+    win and an away win of each sampled game, 0 where one side never happened"""
+    weights = samples.normalized_weights()
+    playoffs = seed_indicators(samples.seeds, len(samples.team_ids))[:, 0, :]
+    weighted_playoffs = playoffs * weights[:, None]
+
+    # weighted playoff counts and weights of the samples where each game was a
+    # home win, one matrix product per chunk of rows to bound memory
+    home_playoffs = np.zeros((len(samples.event_ids), len(samples.team_ids)))
+    home_weights = np.zeros(len(samples.event_ids))
+    for start in range(0, samples.n_simulations, chunk_size):
+        home_wins = samples.outcomes[start : start + chunk_size].T.astype(np.float64)
+        home_playoffs += home_wins @ weighted_playoffs[start : start + chunk_size]
+        home_weights += home_wins @ weights[start : start + chunk_size]
+
+    away_playoffs = weighted_playoffs.sum(axis=0) - home_playoffs
+    away_weights = weights.sum() - home_weights
+
+    possible = ((home_weights > 0) & (away_weights > 0))[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        leverage = (
+            home_playoffs / home_weights[:, None]
+            - away_playoffs / away_weights[:, None]
+        )
+    return np.where(possible, leverage, 0.0)
@@ -1,16 +1,16 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from async_database import get_events
+from async_db import pool
 from config import SEASON
-from database import get_events
-from db import pool
 
 
 async def run_team_record_update(*args) -> Optional[datetime]:
 
     now = datetime.now(tz=timezone.utc)
 
-    events = get_events(SEASON)
+    events = await get_events(SEASON)
 
     # filter for completed events
     completed_events = [event for event in events if event.completed]
@@ -38,28 +38,26 @@ async def run_team_record_update(*args) -> Optional[datetime]:
             records[event.home_team_id]["ties"] += 1
             records[event.away_team_id]["ties"] += 1
 
-    conn = pool.getconn()
     try:
-        with conn.cursor() as cursor:
-            for team_id, record in records.items():
-                cursor.execute(
+        async with pool.connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.executemany(
                     """UPDATE teams 
                     SET wins = %s, 
                         losses = %s, 
                         ties = %s 
                     WHERE id = %s""",
-                    (
-                        record["wins"],
-                        record["losses"],
-                        record["ties"],
-                        team_id,
-                    ),
+                    [
+                        (
+                            record["wins"],
+                            record["losses"],
+                            record["ties"],
+                            team_id,
+                        )
+                        for team_id, record in records.items()
+                    ],
                 )
-        conn.commit()
     except Exception as e:
         print(f"Error updating team records: {e}")
-        conn.rollback()
-    finally:
-        pool.putconn(conn)
 
     return now + timedelta(minutes=5)
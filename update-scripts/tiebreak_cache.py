@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+# stored under a key whose result also depends on its extended key
+_EXTENDED = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups > 0 else 0.0
+
+    def merge(self, other: "CacheStats") -> "CacheStats":
+        return CacheStats(self.hits + other.hits, self.misses + other.misses)
+
+
+class TiebreakCache:
+    """Bounded LRU cache of tiebreak results keyed on the records they depend on.
+
+    Most ties are decided from the tied teams' own results, but some fall
+    through to tiebreakers that also read other teams' records. Those are
+    stored under an extended key, computed only when it is needed, and the
+    base key is marked so lookups know to extend it.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: OrderedDict = OrderedDict()
+        self.stats = CacheStats()
+
+    def get(self, key: Hashable, extended_key: Callable[[], Hashable]) -> Optional[Any]:
+        value = self._get(key)
+        if value is _EXTENDED:
+            value = self._get((key, extended_key()))
+
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, extended_key: Optional[Hashable] = None):
+        if extended_key is None:
+            self._put(key, value)
+        else:
+            self._put(key, _EXTENDED)
+            self._put((key, extended_key), value)
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def _put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,3 +1,4 @@
+import asyncio
 import heapq
 import random
 from dataclasses import dataclass
@@ -22,12 +23,18 @@ class UpdateQueueValue:
 class UpdateQueue:
     def __init__(self):
         self.queue: List[UpdateQueueValue] = []
+        # set when the earliest item changes, to wake wait_until_due
+        self.head_changed = asyncio.Event()
 
     def clear_queue(self):
         self.queue = []
+        self.head_changed.set()
 
     def add(self, key: str, val: datetime):
-        heapq.heappush(self.queue, UpdateQueueValue(key, val))
+        value = UpdateQueueValue(key, val)
+        heapq.heappush(self.queue, value)
+        if self.queue[0] is value:
+            self.head_changed.set()
 
     def pop(self) -> UpdateQueueValue:
         return heapq.heappop(self.queue)
@@ -35,6 +42,32 @@ class UpdateQueue:
     def peek(self) -> Optional[UpdateQueueValue]:
         return self.queue[0] if len(self.queue) > 0 else None
 
+    def pop_due(self, now: datetime) -> List[UpdateQueueValue]:
+        """Pops every item that is due at now, earliest first"""
+        due = []
+        while self.queue and self.queue[0].val <= now:
+            due.append(heapq.heappop(self.queue))
+        return due
+
+    async def wait_until_due(self):
+        """Sleeps until the earliest item is due, waking early when an earlier
+        item is added"""
+        while True:
+            self.head_changed.clear()
+
+            next_item = self.peek()
+            if next_item is None:
+                timeout = None
+            else:
+                timeout = (next_item.val - datetime.now(timezone.utc)).total_seconds()
+                if timeout <= 0:
+                    return
+
+            try:
+                await asyncio.wait_for(self.head_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
     def __len__(self):
         return len(self.queue)
 
@@ -0,0 +1,33 @@
+import numpy as np
+
+
+def win_total_distributions(
+    completed_wins: np.ndarray, win_probs: np.ndarray, max_wins: int = 17
+) -> np.ndarray:
+    """Exact win total distribution of every team (Poisson-binomial).
+
+    completed_wins has the wins each team already has, and win_probs is a
+    (teams x remaining games) matrix of the probability each team wins each
+    game, 0 for games it isn't in. Returns a (teams x max_wins + 1) matrix
+    where [t, w] is the probability team t finishes with w wins.
+    """
+    n_teams = len(completed_wins)
+
+    distributions = np.zeros((n_teams, max_wins + 1))
+    distributions[np.arange(n_teams), completed_wins] = 1
+
+    # add one game at a time: P(w) = P(w) * (1 - p) + P(w - 1) * p
+    for p in win_probs.T:
+        shifted = np.zeros_like(distributions)
+        shifted[:, 1:] = distributions[:, :-1]
+        distributions = distributions * (1 - p)[:, None] + shifted * p[:, None]
+
+    return distributions
+
+
+def win_total_means(completed_wins: np.ndarray, win_probs: np.ndarray) -> np.ndarray:
+    return completed_wins + win_probs.sum(axis=1)
+
+
+def win_total_stds(win_probs: np.ndarray) -> np.ndarray:
+    return np.sqrt((win_probs * (1 - win_probs)).sum(axis=1))